@@ -10,11 +10,18 @@ import sys
 from collections.abc import Iterable
 from pathlib import Path
 
+import numpy as np
+
 
 class Char(enum.IntEnum):
     X_CHAR = 0x78  # lower-case 'x'
 
 
+# Widths from user_logic.sv
+SIZE_WIDTH = 8
+RESULT_WIDTH = 32
+
+
 def decode_inputs(file: Path) -> Iterable[tuple]:
     """
     Decode contents of the given file
@@ -54,6 +61,68 @@ def user_logic(file: Path) -> int:
     return 0
 
 
+def decode_dimensions(file: Path) -> np.ndarray:
+    """
+    Decode contents of the given file in one pass
+
+    :param file: file containing the input values
+    :return: (N, 3) int64 array of (length, width, height)
+    """
+
+    data = open(file).read().replace(chr(Char.X_CHAR.value), " ")
+    return np.array(data.split(), dtype=np.int64).reshape(-1, 3)
+
+
+def vectorized_user_logic(file: Path) -> tuple[int, int]:
+    """
+    Golden model of area_compute.sv and length_compute.sv over all presents
+
+    :param file: file containing the input values
+    :return: wrapping paper and ribbon totals
+    """
+
+    dims = decode_dimensions(file=file)
+    length, width, height = dims.T
+    # area_compute.sv
+    side = length * width
+    front = width * height
+    top = height * length
+    six_sides = (side << 1) + (front << 1) + (top << 1)
+    min_side_or_front = np.where(length < height, side, front)
+    min_stage2_or_top = np.minimum(min_side_or_front, top)
+    area_value = six_sides + min_stage2_or_top
+    # length_compute.sv
+    max_length_or_width = np.maximum(length, width)
+    max_stage1_or_height = np.maximum(max_length_or_width, height)
+    smallest_perimeter = 2 * (length + width + height - max_stage1_or_height)
+    volume = length * width * height
+    length_value = smallest_perimeter + volume
+
+    paper = int(area_value.sum())
+    ribbon = int(length_value.sum())
+    stages = [
+        ("length/width/height", dims, SIZE_WIDTH),
+        ("side/front/top", np.stack((side, front, top)), RESULT_WIDTH),
+        ("six_sides", six_sides, RESULT_WIDTH),
+        ("min_stage2_or_top", min_stage2_or_top, RESULT_WIDTH),
+        ("area_value", area_value, RESULT_WIDTH),
+        ("paper total", paper, RESULT_WIDTH),
+        ("max_stage1_or_height", max_stage1_or_height, SIZE_WIDTH),
+        ("smallest_perimeter", smallest_perimeter, SIZE_WIDTH),
+        ("volume", volume, RESULT_WIDTH),
+        ("length_value", length_value, RESULT_WIDTH),
+        ("ribbon total", ribbon, RESULT_WIDTH),
+    ]
+    print(f"| {'Stage':20} | {'Max value':10} | {'Bits':4} | {'RTL bits':8} |")
+    print(f"|{'-' * 22}|{'-' * 12}|{'-' * 6}|{'-' * 10}|")
+    for name, values, rtl_bits in stages:
+        max_value = int(np.max(values))
+        print(
+            f"| {name:20} | {max_value:10} | {max_value.bit_length():4} | {rtl_bits:8} |"
+        )
+    return (paper, ribbon)
+
+
 def main() -> int:
     """
     Main function
@@ -64,6 +133,8 @@ def main() -> int:
     f = "./input.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"{f=}")
     print(f"Result: {user_logic(file=Path(f))}")
+    paper, ribbon = vectorized_user_logic(file=Path(f))
+    print(f"Wrapping paper: {paper}, ribbon: {ribbon}")
 
     return 0
 
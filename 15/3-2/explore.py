@@ -11,6 +11,8 @@ from collections import Counter
 from collections.abc import Iterable
 from pathlib import Path
 
+import numpy as np
+
 
 class Char(enum.IntEnum):
     LT_CHAR = 0x3C  # '<'
@@ -19,6 +21,33 @@ class Char(enum.IntEnum):
     V_CHAR = 0x76  # lower-case 'v'
 
 
+# Byte to (x, y) move lookup table, non-move bytes are dropped
+MOVE_TABLE = np.zeros((256, 2), dtype=np.int8)
+MOVE_TABLE[Char.LT_CHAR] = (-1, 0)
+MOVE_TABLE[Char.GT_CHAR] = (1, 0)
+MOVE_TABLE[Char.CARET_CHAR] = (0, 1)
+MOVE_TABLE[Char.V_CHAR] = (0, -1)
+MOVE_VALID = np.zeros(256, dtype=bool)
+MOVE_VALID[[char.value for char in Char]] = True
+
+
+def decode_moves(file: Path, chunk_size: int = 1 << 20) -> np.ndarray:
+    """
+    Decode contents of the given file through a byte lookup table
+
+    :param file: file containing the input values
+    :param chunk_size: number of bytes read at once
+    :return: (N, 2) int8 array of (x, y) moves
+    """
+
+    moves = [np.zeros((0, 2), dtype=np.int8)]
+    with open(file, "rb") as f:
+        while chunk := f.read(chunk_size):
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            moves.append(MOVE_TABLE[data[MOVE_VALID[data]]])
+    return np.concatenate(moves)
+
+
 def decode_inputs(file: Path) -> Iterable[tuple]:
     """
     Decode contents of the given file
@@ -27,16 +56,7 @@ def decode_inputs(file: Path) -> Iterable[tuple]:
     :return: list
     """
 
-    for line in open(file):
-        for c in line:
-            if c == chr(Char.LT_CHAR.value):
-                yield (-1, 0)
-            elif c == chr(Char.GT_CHAR.value):
-                yield (1, 0)
-            elif c == chr(Char.CARET_CHAR.value):
-                yield (0, 1)
-            elif c == chr(Char.V_CHAR.value):
-                yield (0, -1)
+    yield from map(tuple, decode_moves(file=file).tolist())
 
 
 def user_logic(file: Path) -> int:
@@ -79,6 +99,39 @@ def user_logic(file: Path) -> int:
     return 0
 
 
+def packed_user_logic(file: Path, agents: int = 1) -> int:
+    """
+    Puzzle solving logic using a bitmap of the packed visited positions
+
+    :param file: file containing the input values
+    :param agents: number of agents taking turns on the moves
+    :return: value to submit
+    """
+
+    moves = decode_moves(file=file)
+    paths = [np.cumsum(moves[i::agents], axis=0, dtype=np.int64) for i in range(agents)]
+    positions = np.concatenate([np.zeros((1, 2), dtype=np.int64), *paths])
+
+    # Bounding box over all agents, origin included
+    min_x, min_y = positions.min(axis=0).tolist()
+    max_x, max_y = positions.max(axis=0).tolist()
+    width = max_x - min_x + 1
+    height = max_y - min_y + 1
+
+    # (x, y) packed as (x - min_x) * height + (y - min_y)
+    packed = (positions[:, 0] - min_x) * height + positions[:, 1] - min_y
+    visited = np.zeros((width * height + 7) // 8, dtype=np.uint8)
+    np.bitwise_or.at(visited, packed >> 3, (1 << (packed & 7)).astype(np.uint8))
+
+    # visited_positions.sv addresses {pos_x, pos_y} with wrapping coordinates
+    position_width = max(1, math.ceil(math.log2(max(width, height))))
+    table_bits = 2 ** (2 * position_width)
+    print(f"Bounding box: {width}x{height}, packed bitmap: {width * height} bits")
+    print(f"Minimum POSITION_WIDTH: {position_width}")
+    print(f"visited_table: {table_bits} bits, {math.ceil(table_bits / 32768)} RAMB36")
+    return int(np.unpackbits(visited).sum())
+
+
 def main() -> int:
     """
     Main function
@@ -89,6 +142,7 @@ def main() -> int:
     f = "./input.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"{f=}")
     print(f"Result: {user_logic(file=Path(f))}")
+    print(f"Packed bitmap result: {packed_user_logic(file=Path(f), agents=2)}")
 
     return 0
 
@@ -6,8 +6,13 @@ Design Space Exploration for Advent of Code 15: Day 4 - Part 1
 import hashlib
 import math
 import os
+import struct
 import sys
+import time
 from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
 
 
 def decode_inputs(file: Path):
@@ -237,6 +242,442 @@ def pad_message(msg: bytes) -> bytearray:
     return msg_buf
 
 
+def pad_messages(secret_key: str, nonces: np.ndarray) -> np.ndarray:
+    """
+    Vectorized counterpart of `pad_message` for a batch of nonces
+
+    :param secret_key: hash prefix shared by all the messages
+    :param nonces: decimal suffixes appended to the secret key
+    :return: MD5 blocks as little-endian message words, shape (N, 16)
+    """
+
+    key = np.frombuffer(secret_key.encode(), dtype=np.uint8)
+    nonces = np.asarray(nonces, dtype=np.uint64)
+    digits = np.ones(len(nonces), dtype=np.int64)
+    for power in range(1, 20):
+        digits += nonces >= np.uint64(10**power)
+    msg_len = len(key) + digits
+    assert msg_len.max(initial=0) < 56, "Message does not fit in a single block"
+
+    msg_buf = np.zeros((len(nonces), 64), dtype=np.uint8)
+    msg_buf[:, : len(key)] = key
+    rows = np.arange(len(nonces))
+    remainder = nonces.copy()
+    for pos in range(digits.max(initial=0) - 1, -1, -1):
+        enabled = pos < digits
+        msg_buf[rows[enabled], len(key) + pos] = 0x30 + remainder[enabled] % 10
+        remainder[enabled] //= np.uint64(10)
+    msg_buf[rows, msg_len] = 0x80  # Single MSB bit
+    msg_buf[:, 56:] = (8 * msg_len).astype("<u8")[:, None].view(np.uint8)
+    return msg_buf.view("<u4").astype(np.uint32)
+
+
+def fpga_md5_batch(msg_words: np.ndarray) -> np.ndarray:
+    """
+    Batched FPGA-based MD5 hash function, same schedule as `fpga_md5`
+
+    :param msg_words: MD5 blocks as little-endian message words, shape (N, 16)
+    :return: hash pieces A, B, C and D, shape (N, 4)
+    """
+
+    ROUNDS = 64
+
+    hash_pieces = np.array(init_values, dtype=np.uint32)
+    a, b, c, d = (np.full(len(msg_words), x, dtype=np.uint32) for x in init_values)
+    for i in range(ROUNDS):
+        f = functions[i](b, c, d)
+        g = index_functions[i](i)
+        to_rotate = a + f + np.uint32(constants[i]) + msg_words[:, g]
+        amount = rotate_amounts[i]
+        rotated = (to_rotate << np.uint32(amount)) | (
+            to_rotate >> np.uint32(32 - amount)
+        )
+        a, b, c, d = d, b + rotated, b, c
+
+    return np.stack([a, b, c, d], axis=1) + hash_pieces
+
+
+def hash_pieces_to_int(hash_pieces: np.ndarray) -> list[int]:
+    """
+    Convert batched hash pieces to the integer representation of `fpga_md5`
+
+    :param hash_pieces: hash pieces A, B, C and D, shape (N, 4)
+    :return: hash values
+    """
+
+    digests = hash_pieces.astype("<u4").tobytes()
+    return [
+        int.from_bytes(digests[16 * i : 16 * i + 16], byteorder="little")
+        for i in range(len(hash_pieces))
+    ]
+
+
+def leading_zeroes_mask(leading_zeroes: int) -> int:
+    """
+    Mask of the hash piece A bits mapping to the leading hex digits of the digest
+
+    :param leading_zeroes: number of leading hex digits
+    :return: mask to apply on the hash piece A
+    """
+
+    mask_be = ((1 << (4 * leading_zeroes)) - 1) << (32 - 4 * leading_zeroes)
+    return int.from_bytes(mask_be.to_bytes(4, byteorder="big"), byteorder="little")
+
+
+def user_logic_batch(
+    file: Path, leading_zeroes: int = 5, batch_size: int = 1 << 18
+) -> int:
+    """
+    Puzzle solving logic using the batched MD5 reference model
+
+    :param file: file containing the input values
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :param batch_size: number of nonces hashed per call
+    :return: value to submit
+    """
+
+    secret_key = decode_inputs(file)
+    mask = np.uint32(leading_zeroes_mask(leading_zeroes))
+    start = 1
+    while True:
+        nonces = np.arange(start, start + batch_size, dtype=np.uint64)
+        hash_pieces = fpga_md5_batch(pad_messages(secret_key, nonces))
+        matches = np.flatnonzero((hash_pieces[:, 0] & mask) == 0)
+        if len(matches):
+            return int(nonces[matches[0]])
+        start += batch_size
+
+
+def check_fpga_md5_batch(file: Path, start: int = 1, count: int = 1 << 16) -> int:
+    """
+    Cross-check the batched MD5 reference model against `fpga_md5` and `hashlib`
+
+    :param file: file containing the input values
+    :param start: first nonce to check
+    :param count: number of nonces to check
+    :return: number of checked nonces
+    """
+
+    secret_key = decode_inputs(file)
+    nonces = np.arange(start, start + count, dtype=np.uint64)
+    hash_pieces = fpga_md5_batch(pad_messages(secret_key, nonces))
+    digests = hash_pieces.astype("<u4").tobytes()
+    for i, nonce in enumerate(range(start, start + count)):
+        msg = f"{secret_key}{nonce}".encode()
+        assert digests[16 * i : 16 * i + 16] == hashlib.md5(msg).digest(), msg
+    for hash_int, nonce in zip(
+        hash_pieces_to_int(hash_pieces[:16]), range(start, start + 16)
+    ):
+        assert hash_int == fpga_md5(f"{secret_key}{nonce}".encode())
+    return count
+
+
+class Md5Midstate(NamedTuple):
+    suffix_offset: int  # bytes, first suffix byte within the block
+    suffix_length: int  # bytes
+    resumed_round: int  # first round depending on the suffix
+    hash_pieces: tuple[int, int, int, int]  # A, B, C, D entering resumed_round
+    suffix_words: range  # message words overlapping the suffix
+    suffix_template: bytes  # padded block bytes spanning suffix_words
+    round_addends: list[int]  # constant plus message word when suffix-agnostic
+    round_suffix_word: list[int | None]  # message word to add when suffix-dependent
+
+
+def fpga_md5_midstate(prefix: bytes, suffix_length: int) -> Md5Midstate:
+    """
+    Precompute everything which depends only on the message prefix
+
+    :param prefix: message prefix (secret key) shared by all the messages
+    :param suffix_length: length of the nonce suffix in bytes
+    :return: midstate from which `fpga_md5_resume` hashes each suffix
+    """
+
+    ROUNDS = 64
+
+    suffix_offset = len(prefix)
+    msg_buf = pad_message(prefix + suffix_length * b"0")
+    msg_words = [
+        int.from_bytes(msg_buf[4 * g : 4 * g + 4], byteorder="little")
+        for g in range(16)
+    ]
+    suffix_words = range(suffix_offset // 4, (suffix_offset + suffix_length + 3) // 4)
+
+    round_addends = []
+    round_suffix_word = []
+    for i in range(ROUNDS):
+        g = index_functions[i](i)
+        if g in suffix_words:
+            round_addends.append(constants[i])
+            round_suffix_word.append(g)
+        else:
+            round_addends.append((constants[i] + msg_words[g]) & 0xFFFFFFFF)
+            round_suffix_word.append(None)
+
+    a, b, c, d = init_values
+    resumed_round = round_suffix_word.index(suffix_words.start)
+    for i in range(resumed_round):
+        f = functions[i](b, c, d) & 0xFFFFFFFF
+        to_rotate = a + f + round_addends[i]
+        a, b, c, d = (
+            d,
+            (b + left_rotate(to_rotate, rotate_amounts[i])) & 0xFFFFFFFF,
+            b,
+            c,
+        )
+
+    return Md5Midstate(
+        suffix_offset=suffix_offset,
+        suffix_length=suffix_length,
+        resumed_round=resumed_round,
+        hash_pieces=(a, b, c, d),
+        suffix_words=suffix_words,
+        suffix_template=bytes(msg_buf[4 * suffix_words.start : 4 * suffix_words.stop]),
+        round_addends=round_addends,
+        round_suffix_word=round_suffix_word,
+    )
+
+
+def fpga_md5_resume(midstate: Md5Midstate, suffix: bytes) -> int:
+    """
+    FPGA-based MD5 hash function resuming from a prefix midstate
+
+    :param midstate: precomputed prefix midstate
+    :param suffix: message suffix (nonce digits)
+    :return: hash value, same as `fpga_md5(prefix + suffix)`
+    """
+
+    ROUNDS = 64
+
+    assert len(suffix) == midstate.suffix_length
+    pos = midstate.suffix_offset - 4 * midstate.suffix_words.start
+    words_buf = bytearray(midstate.suffix_template)
+    words_buf[pos : pos + len(suffix)] = suffix
+    suffix_words = {
+        g: int.from_bytes(words_buf[4 * j : 4 * j + 4], byteorder="little")
+        for j, g in enumerate(midstate.suffix_words)
+    }
+
+    a, b, c, d = midstate.hash_pieces
+    for i in range(midstate.resumed_round, ROUNDS):
+        f = functions[i](b, c, d) & 0xFFFFFFFF
+        to_rotate = a + f + midstate.round_addends[i]
+        g = midstate.round_suffix_word[i]
+        if g is not None:
+            to_rotate += suffix_words[g]
+        a, b, c, d = (
+            d,
+            (b + left_rotate(to_rotate, rotate_amounts[i])) & 0xFFFFFFFF,
+            b,
+            c,
+        )
+
+    hash_pieces = [(x + y) & 0xFFFFFFFF for x, y in zip(init_values, (a, b, c, d))]
+    return sum(x << (32 * i) for i, x in enumerate(hash_pieces))
+
+
+def benchmark_midstate(file: Path, start: int = 1, count: int = 20000) -> float:
+    """
+    Compare `fpga_md5` against the prefix midstate variant over a nonce range
+
+    :param file: file containing the input values
+    :param start: first nonce to hash
+    :param count: number of nonces to hash
+    :return: speedup of the midstate variant
+    """
+
+    secret_key = decode_inputs(file).encode()
+    nonces = [str(i).encode() for i in range(start, start + count)]
+
+    t_start = time.perf_counter()
+    reference = [fpga_md5(secret_key + nonce) for nonce in nonces]
+    t_full = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    midstates: dict[int, Md5Midstate] = {}
+    resumed = []
+    for nonce in nonces:
+        if len(nonce) not in midstates:
+            midstates[len(nonce)] = fpga_md5_midstate(secret_key, len(nonce))
+        resumed.append(fpga_md5_resume(midstates[len(nonce)], nonce))
+    t_midstate = time.perf_counter() - t_start
+
+    assert resumed == reference
+    for length, midstate in sorted(midstates.items()):
+        print(
+            f"Suffix length {length}: resuming at round {midstate.resumed_round}, "
+            f"{len(midstate.suffix_words)} suffix-dependent message words"
+        )
+    print(
+        f"Full: {count / t_full:.0f} hash/s, midstate: {count / t_midstate:.0f} hash/s"
+    )
+    return t_full / t_midstate
+
+
+def fpga_md5_filter(msg: bytes, leading_zeroes: int) -> tuple[bool, int]:
+    """
+    FPGA-based MD5 leading zeroes filter, computing only the digest A word
+
+    The A word of the digest is the B word output by round 60 (shifted through
+    C and D by the following rounds) hence the last three rounds are skipped.
+
+    :param msg: data to hash
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :return: digest starts with the leading zeroes, rounds computed
+    """
+
+    ROUNDS = 64
+    A_FINAL_ROUND = ROUNDS - 4  # B output, then C, D and finally A
+
+    msg_buf: bytearray = pad_message(msg)
+    a, b, c, d = init_values
+    for i in range(A_FINAL_ROUND + 1):
+        f = functions[i](b, c, d) & 0xFFFFFFFF
+        g = index_functions[i](i)
+        msg_word = int.from_bytes(msg_buf[4 * g : 4 * g + 4], byteorder="little")
+        to_rotate = a + f + constants[i] + msg_word
+        a, b, c, d = (
+            d,
+            (b + left_rotate(to_rotate, rotate_amounts[i])) & 0xFFFFFFFF,
+            b,
+            c,
+        )
+
+    digest_a = (init_values[0] + b) & 0xFFFFFFFF
+    return digest_a & leading_zeroes_mask(leading_zeroes) == 0, A_FINAL_ROUND + 1
+
+
+def report_hash_filter(
+    file: Path, leading_zeroes: int = 5, start: int = 1, count: int = 20000
+) -> int:
+    """
+    Check the early-exit filter against `fpga_md5` and report the savings
+
+    :param file: file containing the input values
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :param start: first nonce to check
+    :param count: number of nonces to check
+    :return: number of matching nonces
+    """
+
+    ROUNDS = 64
+    DIGEST_BYTES = 16
+
+    secret_key = decode_inputs(file)
+    matches = 0
+    rounds = 0
+    for i in range(start, start + count):
+        msg = f"{secret_key}{i}".encode()
+        hash_int: int = fpga_md5(msg)
+        hash_bytes = hash_int.to_bytes(16, byteorder="little")
+        hash = f"{int.from_bytes(hash_bytes, byteorder='big'):032x}"
+        match, filter_rounds = fpga_md5_filter(msg, leading_zeroes)
+        assert match == hash.startswith(leading_zeroes * "0"), msg
+        matches += match
+        rounds += filter_rounds
+
+    filter_bytes = math.ceil(4 * leading_zeroes / 8)
+    register_stage = (rounds // count + 1) // 2  # md5_step registers odd rounds
+    print(f"Checked {count} nonces, {matches} with {leading_zeroes} leading zeroes")
+    print(f"Rounds per nonce: {rounds / count:.0f} instead of {ROUNDS}")
+    print(
+        f"Digest bytes per nonce: {filter_bytes} instead of {DIGEST_BYTES} "
+        f"(and {2 * DIGEST_BYTES} hex chars)"
+    )
+    print(
+        f"Digest A word available after register stage {register_stage} "
+        f"instead of {ROUNDS // 2 + 1} (fold register)"
+    )
+    return matches
+
+
+GOLDEN_VECTORS_MAGIC = b"MD5G"
+GOLDEN_VECTORS_VERSION = 1
+# magic, version, record size, first nonce, record count, NUL-padded secret key
+GOLDEN_VECTORS_HEADER = struct.Struct("<4sHHQQ16s")
+GOLDEN_VECTORS_RECORD = np.dtype([("nonce", "<u8"), ("digest", "u1", 16)])
+
+
+def write_golden_vectors(
+    file: Path, output: Path, start: int, count: int, chunk_size: int = 1 << 18
+) -> int:
+    """
+    Stream (nonce, digest) records to a fixed-width binary file
+
+    Digest bytes are stored in `hashlib` order, that is MSB first in the
+    `digest_data` output of `md5_top`.
+
+    :param file: file containing the input values
+    :param output: binary file to write
+    :param start: first nonce
+    :param count: number of records
+    :param chunk_size: number of records computed and written at once
+    :return: number of bytes written
+    """
+
+    secret_key = decode_inputs(file)
+    assert len(secret_key) <= 16, "Secret key does not fit in the header"
+    header = GOLDEN_VECTORS_HEADER.pack(
+        GOLDEN_VECTORS_MAGIC,
+        GOLDEN_VECTORS_VERSION,
+        GOLDEN_VECTORS_RECORD.itemsize,
+        start,
+        count,
+        secret_key.encode(),
+    )
+    records = np.empty(chunk_size, dtype=GOLDEN_VECTORS_RECORD)
+    with open(output, "wb") as fh:
+        fh.write(header)
+        for chunk_start in range(start, start + count, chunk_size):
+            chunk = records[: min(chunk_size, start + count - chunk_start)]
+            chunk["nonce"] = np.arange(chunk_start, chunk_start + len(chunk))
+            hash_pieces = fpga_md5_batch(pad_messages(secret_key, chunk["nonce"]))
+            chunk["digest"] = hash_pieces.astype("<u4").view(np.uint8)
+            fh.write(chunk.tobytes())
+    return GOLDEN_VECTORS_HEADER.size + count * GOLDEN_VECTORS_RECORD.itemsize
+
+
+def read_golden_vectors(vectors: Path) -> tuple[str, np.ndarray]:
+    """
+    Memory-map a file written by `write_golden_vectors`
+
+    :param vectors: binary file to read
+    :return: secret key and (nonce, digest) records
+    """
+
+    with open(vectors, "rb") as fh:
+        header = fh.read(GOLDEN_VECTORS_HEADER.size)
+    magic, version, record_size, _, count, secret_key = GOLDEN_VECTORS_HEADER.unpack(
+        header
+    )
+    assert magic == GOLDEN_VECTORS_MAGIC, f"Invalid magic {magic}"
+    assert version == GOLDEN_VECTORS_VERSION, f"Unsupported version {version}"
+    assert record_size == GOLDEN_VECTORS_RECORD.itemsize
+    records = np.memmap(
+        vectors,
+        dtype=GOLDEN_VECTORS_RECORD,
+        mode="r",
+        offset=GOLDEN_VECTORS_HEADER.size,
+        shape=(count,),
+    )
+    return secret_key.rstrip(b"\0").decode(), records
+
+
+def check_golden_vectors(vectors: Path, step: int = 997) -> int:
+    """
+    Check a sample of the golden vectors against `hashlib`
+
+    :param vectors: binary file to check
+    :param step: distance between checked records
+    :return: number of checked records
+    """
+
+    secret_key, records = read_golden_vectors(vectors)
+    for record in records[::step]:
+        msg = f"{secret_key}{record['nonce']}".encode()
+        assert record["digest"].tobytes() == hashlib.md5(msg).digest(), msg
+    return len(records[::step])
+
+
 def main() -> int:
     """
     Main function
@@ -246,7 +687,11 @@ def main() -> int:
     os.chdir(Path(__file__).resolve().parent)
     f = "./input.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"{f=}")
+    # write_golden_vectors(Path(f), Path("vectors.bin"), start=1, count=1 << 24)
+    print(f"Filter matches: {report_hash_filter(file=Path(f))}")
+    print(f"Midstate speedup: {benchmark_midstate(file=Path(f)):.2f}")
     print(f"Result: {user_logic(file=Path(f))}")
+    print(f"Result: {user_logic_batch(file=Path(f), leading_zeroes=5)}")
     print(f"Result: {user_logic_fpga(file=Path(f))}")
 
     return 0
@@ -5,9 +5,15 @@ Design Space Exploration for Advent of Code 15: Day 4 - Part 2
 
 import hashlib
 import math
+import multiprocessing
 import os
+import struct
 import sys
+import time
 from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
 
 
 def decode_inputs(file: Path):
@@ -47,6 +53,80 @@ def user_logic(file: Path) -> int:
     return i
 
 
+NONCE_UNSET = 2**64 - 1
+found_nonce = None  # shared across the process pool, see init_shard_worker
+
+
+def init_shard_worker(shared_nonce) -> None:
+    """
+    Process pool initializer sharing the smallest nonce found so far
+
+    :param shared_nonce: shared unsigned 64-bit value
+    """
+
+    global found_nonce
+    found_nonce = shared_nonce
+
+
+def search_shard(shard: tuple[str, int, int, int]) -> int | None:
+    """
+    Search a contiguous range of nonces for a matching digest
+
+    Gives up as soon as another worker has found a smaller matching nonce.
+
+    :param shard: secret key, first nonce, end nonce (excluded) and leading zeroes
+    :return: smallest matching nonce within the shard, if any
+    """
+
+    secret_key, start, stop, leading_zeroes = shard
+    prefix = leading_zeroes * "0"
+    for i in range(start, stop):
+        if i % 4096 == 0 and found_nonce.value < i:
+            return None
+        if hashlib.md5(f"{secret_key}{i}".encode()).hexdigest().startswith(prefix):
+            with found_nonce.get_lock():
+                found_nonce.value = min(found_nonce.value, i)
+            return i
+    return None
+
+
+def user_logic_sharded(
+    file: Path,
+    leading_zeroes: int = 6,
+    shard_size: int = 1 << 16,
+    processes: int | None = None,
+) -> int:
+    """
+    Puzzle solving logic splitting the nonce space across a process pool
+
+    Shards are dispatched in increasing order and results are collected in the
+    same order, hence the first matching shard holds the smallest nonce.
+
+    :param file: file containing the input values
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :param shard_size: number of nonces per shard
+    :param processes: number of worker processes, defaults to the CPU count
+    :return: value to submit
+    """
+
+    secret_key = decode_inputs(file)
+    processes = processes or os.cpu_count() or 1
+    shared_nonce = multiprocessing.Value("Q", NONCE_UNSET)
+    start = 1
+    with multiprocessing.Pool(
+        processes, initializer=init_shard_worker, initargs=(shared_nonce,)
+    ) as pool:
+        while True:
+            shards = [
+                (secret_key, s, s + shard_size, leading_zeroes)
+                for s in range(start, start + 4 * processes * shard_size, shard_size)
+            ]
+            for nonce in pool.imap(search_shard, shards):
+                if nonce is not None:
+                    return nonce
+            start = shards[-1][2]
+
+
 def user_logic_fpga(file: Path) -> int:
     """
     Puzzle solving logic
@@ -234,6 +314,550 @@ def pad_message(msg: bytes) -> bytearray:
     return msg_buf
 
 
+def pad_messages(secret_key: str, nonces: np.ndarray) -> np.ndarray:
+    """
+    Vectorized counterpart of `pad_message` for a batch of nonces
+
+    :param secret_key: hash prefix shared by all the messages
+    :param nonces: decimal suffixes appended to the secret key
+    :return: MD5 blocks as little-endian message words, shape (N, 16)
+    """
+
+    key = np.frombuffer(secret_key.encode(), dtype=np.uint8)
+    nonces = np.asarray(nonces, dtype=np.uint64)
+    digits = np.ones(len(nonces), dtype=np.int64)
+    for power in range(1, 20):
+        digits += nonces >= np.uint64(10**power)
+    msg_len = len(key) + digits
+    assert msg_len.max(initial=0) < 56, "Message does not fit in a single block"
+
+    msg_buf = np.zeros((len(nonces), 64), dtype=np.uint8)
+    msg_buf[:, : len(key)] = key
+    rows = np.arange(len(nonces))
+    remainder = nonces.copy()
+    for pos in range(digits.max(initial=0) - 1, -1, -1):
+        enabled = pos < digits
+        msg_buf[rows[enabled], len(key) + pos] = 0x30 + remainder[enabled] % 10
+        remainder[enabled] //= np.uint64(10)
+    msg_buf[rows, msg_len] = 0x80  # Single MSB bit
+    msg_buf[:, 56:] = (8 * msg_len).astype("<u8")[:, None].view(np.uint8)
+    return msg_buf.view("<u4").astype(np.uint32)
+
+
+def fpga_md5_batch(msg_words: np.ndarray) -> np.ndarray:
+    """
+    Batched FPGA-based MD5 hash function, same schedule as `fpga_md5`
+
+    :param msg_words: MD5 blocks as little-endian message words, shape (N, 16)
+    :return: hash pieces A, B, C and D, shape (N, 4)
+    """
+
+    ROUNDS = 64
+
+    hash_pieces = np.array(init_values, dtype=np.uint32)
+    a, b, c, d = (np.full(len(msg_words), x, dtype=np.uint32) for x in init_values)
+    for i in range(ROUNDS):
+        f = functions[i](b, c, d)
+        g = index_functions[i](i)
+        to_rotate = a + f + np.uint32(constants[i]) + msg_words[:, g]
+        amount = rotate_amounts[i]
+        rotated = (to_rotate << np.uint32(amount)) | (
+            to_rotate >> np.uint32(32 - amount)
+        )
+        a, b, c, d = d, b + rotated, b, c
+
+    return np.stack([a, b, c, d], axis=1) + hash_pieces
+
+
+def hash_pieces_to_int(hash_pieces: np.ndarray) -> list[int]:
+    """
+    Convert batched hash pieces to the integer representation of `fpga_md5`
+
+    :param hash_pieces: hash pieces A, B, C and D, shape (N, 4)
+    :return: hash values
+    """
+
+    digests = hash_pieces.astype("<u4").tobytes()
+    return [
+        int.from_bytes(digests[16 * i : 16 * i + 16], byteorder="little")
+        for i in range(len(hash_pieces))
+    ]
+
+
+def leading_zeroes_mask(leading_zeroes: int) -> int:
+    """
+    Mask of the hash piece A bits mapping to the leading hex digits of the digest
+
+    :param leading_zeroes: number of leading hex digits
+    :return: mask to apply on the hash piece A
+    """
+
+    mask_be = ((1 << (4 * leading_zeroes)) - 1) << (32 - 4 * leading_zeroes)
+    return int.from_bytes(mask_be.to_bytes(4, byteorder="big"), byteorder="little")
+
+
+def user_logic_batch(
+    file: Path, leading_zeroes: int = 5, batch_size: int = 1 << 18
+) -> int:
+    """
+    Puzzle solving logic using the batched MD5 reference model
+
+    :param file: file containing the input values
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :param batch_size: number of nonces hashed per call
+    :return: value to submit
+    """
+
+    secret_key = decode_inputs(file)
+    mask = np.uint32(leading_zeroes_mask(leading_zeroes))
+    start = 1
+    while True:
+        nonces = np.arange(start, start + batch_size, dtype=np.uint64)
+        hash_pieces = fpga_md5_batch(pad_messages(secret_key, nonces))
+        matches = np.flatnonzero((hash_pieces[:, 0] & mask) == 0)
+        if len(matches):
+            return int(nonces[matches[0]])
+        start += batch_size
+
+
+def check_fpga_md5_batch(file: Path, start: int = 1, count: int = 1 << 16) -> int:
+    """
+    Cross-check the batched MD5 reference model against `fpga_md5` and `hashlib`
+
+    :param file: file containing the input values
+    :param start: first nonce to check
+    :param count: number of nonces to check
+    :return: number of checked nonces
+    """
+
+    secret_key = decode_inputs(file)
+    nonces = np.arange(start, start + count, dtype=np.uint64)
+    hash_pieces = fpga_md5_batch(pad_messages(secret_key, nonces))
+    digests = hash_pieces.astype("<u4").tobytes()
+    for i, nonce in enumerate(range(start, start + count)):
+        msg = f"{secret_key}{nonce}".encode()
+        assert digests[16 * i : 16 * i + 16] == hashlib.md5(msg).digest(), msg
+    for hash_int, nonce in zip(
+        hash_pieces_to_int(hash_pieces[:16]), range(start, start + 16)
+    ):
+        assert hash_int == fpga_md5(f"{secret_key}{nonce}".encode())
+    return count
+
+
+class Md5Midstate(NamedTuple):
+    suffix_offset: int  # bytes, first suffix byte within the block
+    suffix_length: int  # bytes
+    resumed_round: int  # first round depending on the suffix
+    hash_pieces: tuple[int, int, int, int]  # A, B, C, D entering resumed_round
+    suffix_words: range  # message words overlapping the suffix
+    suffix_template: bytes  # padded block bytes spanning suffix_words
+    round_addends: list[int]  # constant plus message word when suffix-agnostic
+    round_suffix_word: list[int | None]  # message word to add when suffix-dependent
+
+
+def fpga_md5_midstate(prefix: bytes, suffix_length: int) -> Md5Midstate:
+    """
+    Precompute everything which depends only on the message prefix
+
+    :param prefix: message prefix (secret key) shared by all the messages
+    :param suffix_length: length of the nonce suffix in bytes
+    :return: midstate from which `fpga_md5_resume` hashes each suffix
+    """
+
+    ROUNDS = 64
+
+    suffix_offset = len(prefix)
+    msg_buf = pad_message(prefix + suffix_length * b"0")
+    msg_words = [
+        int.from_bytes(msg_buf[4 * g : 4 * g + 4], byteorder="little")
+        for g in range(16)
+    ]
+    suffix_words = range(suffix_offset // 4, (suffix_offset + suffix_length + 3) // 4)
+
+    round_addends = []
+    round_suffix_word = []
+    for i in range(ROUNDS):
+        g = index_functions[i](i)
+        if g in suffix_words:
+            round_addends.append(constants[i])
+            round_suffix_word.append(g)
+        else:
+            round_addends.append((constants[i] + msg_words[g]) & 0xFFFFFFFF)
+            round_suffix_word.append(None)
+
+    a, b, c, d = init_values
+    resumed_round = round_suffix_word.index(suffix_words.start)
+    for i in range(resumed_round):
+        f = functions[i](b, c, d) & 0xFFFFFFFF
+        to_rotate = a + f + round_addends[i]
+        a, b, c, d = (
+            d,
+            (b + left_rotate(to_rotate, rotate_amounts[i])) & 0xFFFFFFFF,
+            b,
+            c,
+        )
+
+    return Md5Midstate(
+        suffix_offset=suffix_offset,
+        suffix_length=suffix_length,
+        resumed_round=resumed_round,
+        hash_pieces=(a, b, c, d),
+        suffix_words=suffix_words,
+        suffix_template=bytes(msg_buf[4 * suffix_words.start : 4 * suffix_words.stop]),
+        round_addends=round_addends,
+        round_suffix_word=round_suffix_word,
+    )
+
+
+def fpga_md5_resume(midstate: Md5Midstate, suffix: bytes) -> int:
+    """
+    FPGA-based MD5 hash function resuming from a prefix midstate
+
+    :param midstate: precomputed prefix midstate
+    :param suffix: message suffix (nonce digits)
+    :return: hash value, same as `fpga_md5(prefix + suffix)`
+    """
+
+    ROUNDS = 64
+
+    assert len(suffix) == midstate.suffix_length
+    pos = midstate.suffix_offset - 4 * midstate.suffix_words.start
+    words_buf = bytearray(midstate.suffix_template)
+    words_buf[pos : pos + len(suffix)] = suffix
+    suffix_words = {
+        g: int.from_bytes(words_buf[4 * j : 4 * j + 4], byteorder="little")
+        for j, g in enumerate(midstate.suffix_words)
+    }
+
+    a, b, c, d = midstate.hash_pieces
+    for i in range(midstate.resumed_round, ROUNDS):
+        f = functions[i](b, c, d) & 0xFFFFFFFF
+        to_rotate = a + f + midstate.round_addends[i]
+        g = midstate.round_suffix_word[i]
+        if g is not None:
+            to_rotate += suffix_words[g]
+        a, b, c, d = (
+            d,
+            (b + left_rotate(to_rotate, rotate_amounts[i])) & 0xFFFFFFFF,
+            b,
+            c,
+        )
+
+    hash_pieces = [(x + y) & 0xFFFFFFFF for x, y in zip(init_values, (a, b, c, d))]
+    return sum(x << (32 * i) for i, x in enumerate(hash_pieces))
+
+
+def benchmark_midstate(file: Path, start: int = 1, count: int = 20000) -> float:
+    """
+    Compare `fpga_md5` against the prefix midstate variant over a nonce range
+
+    :param file: file containing the input values
+    :param start: first nonce to hash
+    :param count: number of nonces to hash
+    :return: speedup of the midstate variant
+    """
+
+    secret_key = decode_inputs(file).encode()
+    nonces = [str(i).encode() for i in range(start, start + count)]
+
+    t_start = time.perf_counter()
+    reference = [fpga_md5(secret_key + nonce) for nonce in nonces]
+    t_full = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    midstates: dict[int, Md5Midstate] = {}
+    resumed = []
+    for nonce in nonces:
+        if len(nonce) not in midstates:
+            midstates[len(nonce)] = fpga_md5_midstate(secret_key, len(nonce))
+        resumed.append(fpga_md5_resume(midstates[len(nonce)], nonce))
+    t_midstate = time.perf_counter() - t_start
+
+    assert resumed == reference
+    for length, midstate in sorted(midstates.items()):
+        print(
+            f"Suffix length {length}: resuming at round {midstate.resumed_round}, "
+            f"{len(midstate.suffix_words)} suffix-dependent message words"
+        )
+    print(
+        f"Full: {count / t_full:.0f} hash/s, midstate: {count / t_midstate:.0f} hash/s"
+    )
+    return t_full / t_midstate
+
+
+def fpga_md5_filter(msg: bytes, leading_zeroes: int) -> tuple[bool, int]:
+    """
+    FPGA-based MD5 leading zeroes filter, computing only the digest A word
+
+    The A word of the digest is the B word output by round 60 (shifted through
+    C and D by the following rounds) hence the last three rounds are skipped.
+
+    :param msg: data to hash
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :return: digest starts with the leading zeroes, rounds computed
+    """
+
+    ROUNDS = 64
+    A_FINAL_ROUND = ROUNDS - 4  # B output, then C, D and finally A
+
+    msg_buf: bytearray = pad_message(msg)
+    a, b, c, d = init_values
+    for i in range(A_FINAL_ROUND + 1):
+        f = functions[i](b, c, d) & 0xFFFFFFFF
+        g = index_functions[i](i)
+        msg_word = int.from_bytes(msg_buf[4 * g : 4 * g + 4], byteorder="little")
+        to_rotate = a + f + constants[i] + msg_word
+        a, b, c, d = (
+            d,
+            (b + left_rotate(to_rotate, rotate_amounts[i])) & 0xFFFFFFFF,
+            b,
+            c,
+        )
+
+    digest_a = (init_values[0] + b) & 0xFFFFFFFF
+    return digest_a & leading_zeroes_mask(leading_zeroes) == 0, A_FINAL_ROUND + 1
+
+
+def report_hash_filter(
+    file: Path, leading_zeroes: int = 6, start: int = 1, count: int = 20000
+) -> int:
+    """
+    Check the early-exit filter against `fpga_md5` and report the savings
+
+    :param file: file containing the input values
+    :param leading_zeroes: number of leading hex zeroes in the digest
+    :param start: first nonce to check
+    :param count: number of nonces to check
+    :return: number of matching nonces
+    """
+
+    ROUNDS = 64
+    DIGEST_BYTES = 16
+
+    secret_key = decode_inputs(file)
+    matches = 0
+    rounds = 0
+    for i in range(start, start + count):
+        msg = f"{secret_key}{i}".encode()
+        hash_int: int = fpga_md5(msg)
+        hash_bytes = hash_int.to_bytes(16, byteorder="little")
+        hash = f"{int.from_bytes(hash_bytes, byteorder='big'):032x}"
+        match, filter_rounds = fpga_md5_filter(msg, leading_zeroes)
+        assert match == hash.startswith(leading_zeroes * "0"), msg
+        matches += match
+        rounds += filter_rounds
+
+    filter_bytes = math.ceil(4 * leading_zeroes / 8)
+    register_stage = (rounds // count + 1) // 2  # md5_step registers odd rounds
+    print(f"Checked {count} nonces, {matches} with {leading_zeroes} leading zeroes")
+    print(f"Rounds per nonce: {rounds / count:.0f} instead of {ROUNDS}")
+    print(
+        f"Digest bytes per nonce: {filter_bytes} instead of {DIGEST_BYTES} "
+        f"(and {2 * DIGEST_BYTES} hex chars)"
+    )
+    print(
+        f"Digest A word available after register stage {register_stage} "
+        f"instead of {ROUNDS // 2 + 1} (fold register)"
+    )
+    return matches
+
+
+HASH_SUFFIX_DIGITS = 7  # ascii_counter digits, see user_logic.sv
+MD5_TOP_UNITS = 7  # see md5_engine_units.sv
+CFGCLK_PERIOD_NS = 15  # see constraints.xdc
+MD5_CAPTURE_STAGES = 1  # md5_top: capture_md5_block_data
+MD5_STEP_STAGES = 64 // 2  # md5_step: output register on odd rounds only
+MD5_FOLD_STAGES = 1  # md5_top: a_fold, b_fold, c_fold and d_fold
+MD5_TOP_LATENCY = MD5_CAPTURE_STAGES + MD5_STEP_STAGES + MD5_FOLD_STAGES
+MD5_TOP_PERIOD = MD5_TOP_LATENCY + 1  # md5_block_ready set back on digest_valid
+DISPATCH_LATENCY = 2  # message_concat and message_length_inserter registers
+RESULT_LATENCY = 1 + 1 + 2 + 128 // 8  # hash_filter, collector, suffix_extractor
+
+
+def simulate_md5_engine_units(units: int, cycles: int) -> list[int]:
+    """
+    Cycle-level model of the nonce dispatch and md5_top pipelines
+
+    Models the ready/valid registers of ascii_counter, message_concat,
+    message_length_inserter, the md5_engine_units round-robin dispatcher and
+    the valid pipeline of each md5_top instance.
+
+    :param units: number of MD5 engine instances
+    :param cycles: number of clock cycles to simulate
+    :return: dispatch cycle of each nonce, starting with nonce 1
+    """
+
+    counter = 1  # ascii_counter reset value
+    msg_valid, msg_nonce = False, 0
+    block_valid, block_nonce = False, 0
+    unit_sel = 0
+    unit_ready = units * [True]
+    unit_pipes = [MD5_TOP_LATENCY * [False] for _ in range(units)]
+    dispatch_cycles = []
+
+    for cycle in range(cycles):
+        md5_block_ready = unit_ready[unit_sel]
+        handshake = md5_block_ready and block_valid
+        msg_ready = md5_block_ready or not block_valid
+        suffix_ready = msg_ready or not msg_valid
+
+        for u in range(units):
+            digest_valid = unit_pipes[u][-1]
+            unit_valid = u == unit_sel and block_valid
+            unit_pipes[u] = [unit_ready[u] and unit_valid] + unit_pipes[u][:-1]
+            if digest_valid:
+                unit_ready[u] = True
+            elif unit_valid:
+                unit_ready[u] = False
+        if handshake:
+            dispatch_cycles.append(cycle)
+            assert block_nonce == len(dispatch_cycles)
+            unit_sel = (unit_sel + 1) % units
+        if msg_ready:
+            block_valid, block_nonce = msg_valid, msg_nonce if msg_valid else 0
+        if suffix_ready:
+            msg_valid, msg_nonce = True, counter
+            counter += 1
+
+    return dispatch_cycles
+
+
+def dispatch_cycle(units: int, nonce: int) -> int:
+    """
+    Closed-form dispatch cycle matching `simulate_md5_engine_units`
+
+    :param units: number of MD5 engine instances
+    :param nonce: nonce value, starting from 1
+    :return: clock cycle at which the nonce is dispatched to an MD5 engine
+    """
+
+    k = nonce - 1
+    if units >= MD5_TOP_PERIOD:
+        return DISPATCH_LATENCY + k
+    return DISPATCH_LATENCY + (k // units) * MD5_TOP_PERIOD + k % units
+
+
+def report_md5_engine_units(
+    file: Path, answer: int | None = None, max_units: int = 2 * MD5_TOP_UNITS
+) -> int:
+    """
+    Predict the cycles to the answer for various MD5 engine unit counts
+
+    :param file: file containing the input values
+    :param answer: matching nonce, searched with `user_logic_batch` if omitted
+    :param max_units: largest number of MD5 engine instances to report
+    :return: cycles to the answer for `MD5_TOP_UNITS` instances
+    """
+
+    if answer is None:
+        answer = user_logic_batch(file, leading_zeroes=6)
+    assert answer < 10**HASH_SUFFIX_DIGITS, "ascii_counter would wrap around"
+
+    print(f"| {'Units':5} | {'Hash/Clock':10} | {'Cycles':11} | {'Runtime':9} |")
+    print(f"|{'-' * 7}|{'-' * 12}|{'-' * 13}|{'-' * 11}|")
+    for units in range(1, max_units + 1):
+        sim_cycles = 4 * MD5_TOP_PERIOD
+        simulated = simulate_md5_engine_units(units, sim_cycles)
+        assert simulated == [
+            dispatch_cycle(units, n + 1) for n in range(len(simulated))
+        ]
+        cycles = dispatch_cycle(units, answer) + MD5_TOP_LATENCY + RESULT_LATENCY
+        hash_per_clock = min(units, MD5_TOP_PERIOD) / MD5_TOP_PERIOD
+        runtime = cycles * CFGCLK_PERIOD_NS * 1e-9
+        print(
+            f"| {units:5} | {hash_per_clock:10.3f} | {cycles:11} | {runtime:7.2f} s |"
+        )
+    return dispatch_cycle(MD5_TOP_UNITS, answer) + MD5_TOP_LATENCY + RESULT_LATENCY
+
+
+GOLDEN_VECTORS_MAGIC = b"MD5G"
+GOLDEN_VECTORS_VERSION = 1
+# magic, version, record size, first nonce, record count, NUL-padded secret key
+GOLDEN_VECTORS_HEADER = struct.Struct("<4sHHQQ16s")
+GOLDEN_VECTORS_RECORD = np.dtype([("nonce", "<u8"), ("digest", "u1", 16)])
+
+
+def write_golden_vectors(
+    file: Path, output: Path, start: int, count: int, chunk_size: int = 1 << 18
+) -> int:
+    """
+    Stream (nonce, digest) records to a fixed-width binary file
+
+    Digest bytes are stored in `hashlib` order, that is MSB first in the
+    `digest_data` output of `md5_top`.
+
+    :param file: file containing the input values
+    :param output: binary file to write
+    :param start: first nonce
+    :param count: number of records
+    :param chunk_size: number of records computed and written at once
+    :return: number of bytes written
+    """
+
+    secret_key = decode_inputs(file)
+    assert len(secret_key) <= 16, "Secret key does not fit in the header"
+    header = GOLDEN_VECTORS_HEADER.pack(
+        GOLDEN_VECTORS_MAGIC,
+        GOLDEN_VECTORS_VERSION,
+        GOLDEN_VECTORS_RECORD.itemsize,
+        start,
+        count,
+        secret_key.encode(),
+    )
+    records = np.empty(chunk_size, dtype=GOLDEN_VECTORS_RECORD)
+    with open(output, "wb") as fh:
+        fh.write(header)
+        for chunk_start in range(start, start + count, chunk_size):
+            chunk = records[: min(chunk_size, start + count - chunk_start)]
+            chunk["nonce"] = np.arange(chunk_start, chunk_start + len(chunk))
+            hash_pieces = fpga_md5_batch(pad_messages(secret_key, chunk["nonce"]))
+            chunk["digest"] = hash_pieces.astype("<u4").view(np.uint8)
+            fh.write(chunk.tobytes())
+    return GOLDEN_VECTORS_HEADER.size + count * GOLDEN_VECTORS_RECORD.itemsize
+
+
+def read_golden_vectors(vectors: Path) -> tuple[str, np.ndarray]:
+    """
+    Memory-map a file written by `write_golden_vectors`
+
+    :param vectors: binary file to read
+    :return: secret key and (nonce, digest) records
+    """
+
+    with open(vectors, "rb") as fh:
+        header = fh.read(GOLDEN_VECTORS_HEADER.size)
+    magic, version, record_size, _, count, secret_key = GOLDEN_VECTORS_HEADER.unpack(
+        header
+    )
+    assert magic == GOLDEN_VECTORS_MAGIC, f"Invalid magic {magic}"
+    assert version == GOLDEN_VECTORS_VERSION, f"Unsupported version {version}"
+    assert record_size == GOLDEN_VECTORS_RECORD.itemsize
+    records = np.memmap(
+        vectors,
+        dtype=GOLDEN_VECTORS_RECORD,
+        mode="r",
+        offset=GOLDEN_VECTORS_HEADER.size,
+        shape=(count,),
+    )
+    return secret_key.rstrip(b"\0").decode(), records
+
+
+def check_golden_vectors(vectors: Path, step: int = 997) -> int:
+    """
+    Check a sample of the golden vectors against `hashlib`
+
+    :param vectors: binary file to check
+    :param step: distance between checked records
+    :return: number of checked records
+    """
+
+    secret_key, records = read_golden_vectors(vectors)
+    for record in records[::step]:
+        msg = f"{secret_key}{record['nonce']}".encode()
+        assert record["digest"].tobytes() == hashlib.md5(msg).digest(), msg
+    return len(records[::step])
+
+
 def main() -> int:
     """
     Main function
@@ -243,7 +867,14 @@ def main() -> int:
     os.chdir(Path(__file__).resolve().parent)
     f = "./input.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"{f=}")
+    # write_golden_vectors(Path(f), Path("vectors.bin"), start=1, count=1 << 24)
+    print(f"Filter matches: {report_hash_filter(file=Path(f))}")
+    print(f"Midstate speedup: {benchmark_midstate(file=Path(f)):.2f}")
     print(f"Result: {user_logic(file=Path(f))}")
+    answer = user_logic_batch(file=Path(f), leading_zeroes=6)
+    print(f"Result: {answer}")
+    print(f"Result: {user_logic_sharded(file=Path(f))}")
+    print(f"Cycles: {report_md5_engine_units(file=Path(f), answer=answer)}")
     # print(f"Result: {user_logic_fpga(file=Path(f))}")
 
     return 0
@@ -3,9 +3,12 @@
 Design Space Exploration for Advent of Code 15: Day 5 - Part 2
 """
 
+import itertools
 import math
 import os
+import random
 import sys
+import time
 from pathlib import Path
 from typing import Iterator
 
@@ -43,6 +46,39 @@ def string_is_nice(string: str) -> list[bool]:
     return [pair and repeat, pair, repeat]
 
 
+def user_logic_stream(file: Path) -> int:
+    nice, pairs, repeats = classify_strings(file)
+    print(f"Repeat pairs: {pairs}")
+    print(f"Repeat chars: {repeats}")
+    return nice
+
+
+def classify_strings(file: Path, chunk_size: int = 1 << 16) -> tuple[int, int, int]:
+    # Single pass over the file contents, remembering for the current string
+    # the index at which each pair of chars was first seen and the last chars
+    nice = pairs = repeats = 0
+    first_pair_index: dict[str, int] = {}
+    index, prev_char, prev_prev_char = 0, "", ""
+    pair = repeat = False
+    with open(file) as fh:
+        chunks = iter(lambda: fh.read(chunk_size), "")
+        for char in itertools.chain(itertools.chain.from_iterable(chunks), "\n"):
+            if char == "\n":
+                nice += pair and repeat
+                pairs += pair
+                repeats += repeat
+                first_pair_index.clear()
+                index, prev_char, prev_prev_char = 0, "", ""
+                pair = repeat = False
+                continue
+            if index > 0 and not pair:
+                pair_index = first_pair_index.setdefault(prev_char + char, index - 1)
+                pair = index - 1 - pair_index >= MIN_PAIR_DISTANCE
+            repeat = repeat or char == prev_prev_char
+            index, prev_char, prev_prev_char = index + 1, char, prev_char
+    return nice, pairs, repeats
+
+
 # FPGA Friendly Implementation -------------------------------------------------
 
 
@@ -100,7 +136,7 @@ def has_repeated_pairs_ht(string: str) -> bool:
 def has_repeated_pairs_dcc(string: str) -> bool:
     # Dual cross correlation approach
     start_offset = MIN_PAIR_DISTANCE
-    stop_offset = len(string) - MIN_PAIR_DISTANCE
+    stop_offset = len(string) - MIN_PAIR_DISTANCE + 1
     identical_pairs = False
     for char_offset in range(start_offset, stop_offset):
         char_map = zip(string, string[char_offset:])
@@ -112,6 +148,51 @@ def has_repeated_pairs_dcc(string: str) -> bool:
     return identical_pairs
 
 
+def benchmark_pair_detectors(
+    lengths: tuple[int, ...] = (16, 32, 64, 128, 256), count: int = 1000, seed: int = 0
+) -> None:
+    # Hardware costs:
+    # - HT: lookup and update of a 1024-entry table per char, plus a clearing
+    #   sweep of one write per pair once the string is processed
+    # - DCC: one char comparator per correlated char per offset, evaluated at
+    #   once at the end of the string shifted in one char per cycle
+    rng = random.Random(seed)
+    print(
+        f"| {'Length':6} | {'HT str/s':9} | {'HT entries':10} | {'HT cyc/char':11} "
+        f"| {'DCC str/s':9} | {'DCC comparators':15} | {'DCC cyc/char':12} |"
+    )
+    print(
+        f"|{'-' * 8}|{'-' * 11}|{'-' * 12}|{'-' * 13}|{'-' * 11}|{'-' * 17}|{'-' * 14}|"
+    )
+    for length in lengths:
+        strings = [
+            bytes(
+                rng.choices(range(ASCII_LOWER_A, ASCII_LOWER_A + 26), k=length)
+            ).decode()
+            for _ in range(count)
+        ]
+        t_start = time.perf_counter()
+        ht_results = [has_repeated_pairs_ht(s) for s in strings]
+        ht_rate = count / (time.perf_counter() - t_start)
+        t_start = time.perf_counter()
+        dcc_results = [has_repeated_pairs_dcc(s) for s in strings]
+        dcc_rate = count / (time.perf_counter() - t_start)
+        assert ht_results == dcc_results
+
+        pairs = length - MIN_PAIR_DISTANCE + 1
+        ht_entries = sum(len({s[i : i + 2] for i in range(pairs)}) for s in strings)
+        ht_entries = (ht_entries + count * pairs) / count  # inserts and clears
+        ht_cycles = (length + pairs) / length
+        dcc_comparators = sum(
+            length - offset
+            for offset in range(MIN_PAIR_DISTANCE, length - MIN_PAIR_DISTANCE + 1)
+        )
+        print(
+            f"| {length:6} | {ht_rate:9.0f} | {ht_entries:10.1f} | {ht_cycles:11.2f} "
+            f"| {dcc_rate:9.0f} | {dcc_comparators:15} | {1:12.2f} |"
+        )
+
+
 def fpga_user_logic(file: Path) -> int:
     result = 0
     string = ""
@@ -134,12 +215,157 @@ def fpga_user_logic(file: Path) -> int:
     return result
 
 
+STRING_CHARS = 16  # see user_logic.sv
+LF_CHAR = "\n"
+NULL_CHAR = "\0"
+CHAR_MASK = 2**CHAR_BITS - 1
+
+
+class RepeatingCharTracker:
+    """
+    Character-at-a-time model of repeating_char_tracker.sv
+    """
+
+    def __init__(self, string_chars: int = STRING_CHARS):
+        self.string_mask = 2 ** (CHAR_BITS * string_chars) - 1
+        self.char_history = [NULL_CHAR, NULL_CHAR]
+        self.end_of_file = False
+        self.has_repeating_char = False
+        self.string_data = 0
+
+    def push(self, char: str) -> bool:
+        """
+        Process an inbound char
+
+        :param char: inbound char
+        :return: string_valid, i.e. `char` ends a string
+        """
+
+        last_char, prev_char = self.char_history
+        if char == prev_char and char.islower() and last_char.islower():
+            self.has_repeating_char = True
+        self.char_history = [char, last_char]
+        if char == NULL_CHAR:
+            self.end_of_file = True
+        elif char != LF_CHAR:
+            self.string_data = (
+                (self.string_data << CHAR_BITS) | (ord(char) & CHAR_MASK)
+            ) & self.string_mask
+        return char == LF_CHAR
+
+    def clear(self) -> None:
+        self.has_repeating_char = False
+
+
+class NonOverlappingPairsTracker:
+    """
+    Character-at-a-time non-overlapping pairs tracker
+
+    Pair table entries are tagged with the string index, so moving on to the
+    next string invalidates all of them without any clearing sweep.
+    """
+
+    def __init__(self):
+        self.pair_table_tags = [-1] * 2**CHAR_BITS * 2**CHAR_BITS
+        self.pair_table_offsets = [0] * 2**CHAR_BITS * 2**CHAR_BITS
+        self.tag = 0
+        self.offset = 0
+        self.last_char = 0
+        self.has_repeated_pairs = False
+
+    def push(self, char: str) -> None:
+        """
+        Process a string char
+
+        :param char: string char, excluding LF and NUL
+        """
+
+        char_bits = ord(char) & CHAR_MASK
+        if self.offset > 0:
+            index = (self.last_char << CHAR_BITS) | char_bits
+            if self.pair_table_tags[index] != self.tag:
+                self.pair_table_tags[index] = self.tag
+                self.pair_table_offsets[index] = self.offset - 1
+            elif self.offset - 1 - self.pair_table_offsets[index] >= MIN_PAIR_DISTANCE:
+                self.has_repeated_pairs = True
+        self.last_char = char_bits
+        self.offset += 1
+
+    def clear(self) -> None:
+        self.tag += 1
+        self.offset = 0
+        self.has_repeated_pairs = False
+
+
+def correlate_string_data(string_data: int, string_chars: int = STRING_CHARS) -> bool:
+    """
+    Model of the non_overlapping_pairs_tracker.sv correlation blocks
+
+    Identical chars are flagged using per-field zero detection on the XOR
+    of the string data and its shifted copy, all fields at once.
+
+    :param string_data: string shift register, last char in the LSBs
+    :param string_chars: string shift register depth
+    :return: string has non-overlapping pairs
+    """
+
+    for offset in range(MIN_PAIR_DISTANCE, string_chars - 1):
+        field_lsbs = (2 ** (CHAR_BITS * (string_chars - offset)) - 1) // CHAR_MASK
+        low_bits = field_lsbs * (CHAR_MASK >> 1)
+        high_bits = field_lsbs * (CHAR_MASK - (CHAR_MASK >> 1))
+        diff = ((string_data >> (CHAR_BITS * offset)) ^ string_data) & (
+            low_bits | high_bits
+        )
+        identical_chars = ~(((diff & low_bits) + low_bits) | diff) & high_bits
+        if identical_chars & (identical_chars >> CHAR_BITS):
+            return True
+    return False
+
+
+def fpga_stream_user_logic(file: Path) -> int:
+    result = 0
+    strings = 0
+    rtl_mismatches = 0
+    repeating_char_tracker = RepeatingCharTracker()
+    pairs_tracker = NonOverlappingPairsTracker()
+    for byte in fpga_tap_decoder(file):
+        string_valid = repeating_char_tracker.push(byte)
+        if byte not in (LF_CHAR, NULL_CHAR):
+            pairs_tracker.push(byte)
+        if string_valid:
+            strings += 1
+            repeated_pairs = pairs_tracker.has_repeated_pairs
+            rtl_repeated_pairs = correlate_string_data(
+                repeating_char_tracker.string_data
+            )
+            rtl_mismatches += repeated_pairs != rtl_repeated_pairs
+            if repeated_pairs and repeating_char_tracker.has_repeating_char:
+                result += 1
+            repeating_char_tracker.clear()
+            pairs_tracker.clear()
+    print(f"Strings: {strings}, RTL correlation mismatches: {rtl_mismatches}")
+    return result
+
+
+def write_synthetic_strings(
+    output: Path, count: int, length: int = STRING_CHARS, seed: int = 0
+) -> None:
+    rng = random.Random(seed)
+    with open(output, "w") as fh:
+        for _ in range(count):
+            chars = rng.choices(range(ASCII_LOWER_A, ASCII_LOWER_A + 26), k=length)
+            fh.write(bytes(chars).decode() + "\n")
+
+
 def main() -> int:
     os.chdir(Path(__file__).resolve().parent)
     file = "./input.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"Contents {file=}")
     print(f"Result: {user_logic(file=Path(file))}")
+    print(f"Streaming result: {user_logic_stream(file=Path(file))}")
     print(f"FPGA-style impl result: {fpga_user_logic(file=Path(file))}")
+    benchmark_pair_detectors()
+    print(f"Streaming FPGA-style result: {fpga_stream_user_logic(file=Path(file))}")
 
     return 0
 
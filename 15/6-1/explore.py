@@ -3,14 +3,17 @@
 Design Space Exploration for Advent of Code 15: Day 6 - Part 1
 """
 
+import bisect
 import os
+import random
 import re
 import sys
-from collections import Counter
+from collections import Counter, defaultdict
 from pathlib import Path
 from pickletools import stackslice
 from typing import Any, Iterator
 
+import numpy as np
 from PIL import Image
 
 INPUT_REGEX = (
@@ -53,6 +56,61 @@ def user_logic(file: Path) -> int:
     return sum(v[0] for v in lit_lights.values())
 
 
+def user_logic_dense(file: Path, frame_every: int | None = None) -> int:
+    lit_lights = np.zeros(LIGHT_GRID_SIZE, dtype=bool)
+    update_depths = np.zeros(LIGHT_GRID_SIZE, dtype=np.int32)
+    instructions = list(decode_inputs(file))
+    if frame_every:
+        os.makedirs("frames", exist_ok=True)
+    for i, instr in enumerate(instructions):
+        lights = np.s_[instr["x0"] : instr["x1"] + 1, instr["y0"] : instr["y1"] + 1]
+        if "on" == instr["action"]:
+            lit_lights[lights] = True
+        elif "off" == instr["action"]:
+            lit_lights[lights] = False
+        elif "toggle" == instr["action"]:
+            lit_lights[lights] ^= True
+        update_depths[lights] = i
+        if frame_every and (i + 1) % frame_every == 0:
+            prefix = f"frames/{i + 1:04d}_"
+            dump_light_planes(lit_lights, update_depths, len(instructions), prefix)
+    dump_light_planes(lit_lights, update_depths, len(instructions))
+    return int(np.count_nonzero(lit_lights))
+
+
+def user_logic_compressed(file: Path) -> int:
+    # lights sharing the same instruction edges are grouped into blocks, hence
+    # memory scales with the number of instructions instead of the grid area
+    instructions = list(decode_inputs(file))
+    x_edges = np.unique([e for i in instructions for e in (i["x0"], i["x1"] + 1)])
+    y_edges = np.unique([e for i in instructions for e in (i["y0"], i["y1"] + 1)])
+    lit_blocks = np.zeros((len(x_edges) - 1, len(y_edges) - 1), dtype=bool)
+    for instr in instructions:
+        x0, x1 = np.searchsorted(x_edges, (instr["x0"], instr["x1"] + 1))
+        y0, y1 = np.searchsorted(y_edges, (instr["y0"], instr["y1"] + 1))
+        if "on" == instr["action"]:
+            lit_blocks[x0:x1, y0:y1] = True
+        elif "off" == instr["action"]:
+            lit_blocks[x0:x1, y0:y1] = False
+        elif "toggle" == instr["action"]:
+            lit_blocks[x0:x1, y0:y1] ^= True
+    print(f"Compressed grid: {lit_blocks.shape[0]}x{lit_blocks.shape[1]} blocks")
+    block_areas = np.outer(np.diff(x_edges), np.diff(y_edges))
+    return int(block_areas[lit_blocks].sum())
+
+
+def write_synthetic_instructions(
+    output: Path, count: int, grid_size: tuple[int, int], seed: int = 0
+) -> None:
+    rng = random.Random(seed)
+    with open(output, "w") as fh:
+        for _ in range(count):
+            action = rng.choice(("turn on", "turn off", "toggle"))
+            x0, x1 = sorted(rng.randrange(grid_size[0]) for _ in range(2))
+            y0, y1 = sorted(rng.randrange(grid_size[1]) for _ in range(2))
+            fh.write(f"{action} {x0},{y0} through {x1},{y1}\n")
+
+
 def explore(instructions: list) -> None:
     actions = Counter(i["action"] for i in instructions)
     print(f"Got {actions.total()} instructions")
@@ -96,19 +154,24 @@ def explore(instructions: list) -> None:
 
 
 def dump_lit_lights(lit_lights: dict, instruction_length: int) -> None:
-    pixels_img = Image.new("1", LIGHT_GRID_SIZE, 0)
-    updates_img = Image.new("RGB", LIGHT_GRID_SIZE, 0x000000)
-    pixels = pixels_img.load()
-    updates = updates_img.load()
-    for (x, y), (is_on, depth) in lit_lights.items():
-        pixels[x, y] = 1 if is_on else 0
-        updates[x, y] = (
-            int(depth * 255 / instruction_length) << 16
-            if is_on
-            else int(depth * 255 / instruction_length)
-        )
-    pixels_img.save("lit_lights.png")
-    updates_img.save("light_updates.png")
+    lit = np.zeros(LIGHT_GRID_SIZE, dtype=bool)
+    depths = np.zeros(LIGHT_GRID_SIZE, dtype=np.int32)
+    if lit_lights:
+        xs, ys = np.array(list(lit_lights.keys())).T
+        lit[xs, ys], depths[xs, ys] = np.array(list(lit_lights.values())).T
+    dump_light_planes(lit, depths, instruction_length)
+
+
+def dump_light_planes(
+    lit: np.ndarray, depths: np.ndarray, instruction_length: int, prefix: str = ""
+) -> None:
+    # PIL images are indexed by (x, y), hence the transpositions
+    shades = (depths.T * 255 // instruction_length).astype(np.uint8)
+    updates = np.zeros((*shades.shape, 3), dtype=np.uint8)
+    updates[..., 0] = np.where(lit.T, 0, shades)
+    updates[..., 2] = np.where(lit.T, shades, 0)
+    Image.fromarray(lit.T).save(f"{prefix}lit_lights.png")
+    Image.fromarray(updates).save(f"{prefix}light_updates.png")
 
 
 # FPGA Friendly Implementation -------------------------------------------------
@@ -154,12 +217,85 @@ def fpga_user_logic(file: Path) -> int:
     return lit_light_sum
 
 
+def fpga_bitset_user_logic(file: Path) -> int:
+    # one packed bit per light, MSB first as in `fpga_user_logic`
+    lit_rows = np.zeros(
+        (LIGHT_GRID_SIZE[1], (LIGHT_GRID_SIZE[0] + 7) // 8), dtype=np.uint8
+    )
+    instructions = list(decode_inputs(file))
+    for instr in instructions:
+        col_select = np.zeros(LIGHT_GRID_SIZE[0], dtype=bool)
+        col_select[instr["x0"] : instr["x1"] + 1] = True
+        col_mask = np.packbits(col_select)
+        rows = lit_rows[instr["y0"] : instr["y1"] + 1]
+        if instr["action"] == "on":
+            rows |= col_mask
+        elif instr["action"] == "off":
+            rows &= ~col_mask
+        elif instr["action"] == "toggle":
+            rows ^= col_mask
+    print(f"Bitset size: {lit_rows.nbytes} bytes")
+    return int(np.unpackbits(lit_rows).sum())
+
+
+INSTRUCTION_OVERHEAD = 3  # light_display: ready, start_process and last row
+ROW_BUFFER_LATENCY = 2  # row-major sweep: row read and write back
+
+
+def fpga_row_sweep_user_logic(file: Path) -> tuple[int, list[int]]:
+    instructions = list(decode_inputs(file))
+    starting_rows = defaultdict(list)
+    ending_rows = defaultdict(list)
+    bit_masks = []
+    for i, instr in enumerate(instructions):
+        starting_rows[instr["y0"]].append(i)
+        ending_rows[instr["y1"]].append(i)
+        bit_masks.append(((1 << (instr["x1"] - instr["x0"] + 1)) - 1) << instr["x0"])
+
+    active_instructions: list[int] = []  # kept sorted, order matters
+    active_counts = []
+    lit_light_sum = 0
+    for row in range(LIGHT_GRID_SIZE[1]):
+        for i in starting_rows[row]:
+            bisect.insort(active_instructions, i)
+        row_buffer = 0
+        for i in active_instructions:
+            if instructions[i]["action"] == "on":
+                row_buffer |= bit_masks[i]
+            elif instructions[i]["action"] == "off":
+                row_buffer &= ~bit_masks[i]
+            elif instructions[i]["action"] == "toggle":
+                row_buffer ^= bit_masks[i]
+        lit_light_sum += row_buffer.bit_count()
+        active_counts.append(len(active_instructions))
+        for i in ending_rows[row]:
+            active_instructions.remove(i)
+
+    row_major_cycles = sum(n + ROW_BUFFER_LATENCY for n in active_counts if n)
+    instr_major_cycles = sum(
+        instr["y1"] - instr["y0"] + 1 + INSTRUCTION_OVERHEAD for instr in instructions
+    )
+    busiest_row = max(range(len(active_counts)), key=active_counts.__getitem__)
+    print(f"Active instructions per row: {min(active_counts)} min")
+    print(f" - {sum(active_counts) / len(active_counts):.1f} average")
+    print(f" - {active_counts[busiest_row]} max (row {busiest_row})")
+    print(f"Estimated cycles, row-major sweep: {row_major_cycles}")
+    print(f"Estimated cycles, instruction-major (light_display): {instr_major_cycles}")
+    return (lit_light_sum, active_counts)
+
+
 def main() -> int:
     os.chdir(Path(__file__).resolve().parent)
     file = "./input.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"Contents {file=}")
     print(f"Result: {user_logic(file=Path(file))}")
+    print(f"Dense result: {user_logic_dense(file=Path(file))}")
+    print(f"Compressed result: {user_logic_compressed(file=Path(file))}")
     print(f"FPGA-style impl result: {fpga_user_logic(file=Path(file))}")
+    print(f"Bitset result: {fpga_bitset_user_logic(file=Path(file))}")
+    result, active_counts = fpga_row_sweep_user_logic(file=Path(file))
+    print(f"Row sweep result: {result}")
+    print(f"Instruction buffer depth: {max(active_counts)}")
 
     return 0
 
@@ -3,14 +3,17 @@
 Design Space Exploration for Advent of Code 15: Day 6 - Part 2
 """
 
+import bisect
 import math
 import os
+import random
 import re
 import sys
 from collections import Counter, defaultdict
 from pathlib import Path
 from typing import Any, Iterator
 
+import numpy as np
 from PIL import Image
 
 INPUT_REGEX = (
@@ -59,6 +62,86 @@ def user_logic(file: Path) -> int:
     return sum(v[0] for v in lit_lights.values())
 
 
+def user_logic_dense(file: Path, frame_every: int | None = None) -> int:
+    # same [intensity, max intensity] pairs as `user_logic`, one plane each
+    intensities = np.zeros(LIGHT_GRID_SIZE, dtype=np.int32)
+    max_intensities = np.zeros(LIGHT_GRID_SIZE, dtype=np.int32)
+    instructions = list(decode_inputs(file))
+    if frame_every:
+        os.makedirs("frames", exist_ok=True)
+    for i, instr in enumerate(instructions):
+        lights = np.s_[
+            instr["start_row"] : instr["end_row"] + 1,
+            instr["start_col"] : instr["end_col"] + 1,
+        ]
+        old_values = intensities[lights]
+        if "on" == instr["action"]:
+            old_values += 1
+            max_intensities[lights] = old_values
+        elif "off" == instr["action"]:
+            max_intensities[lights] = old_values
+            np.maximum(old_values - 1, 0, out=old_values)
+        elif "toggle" == instr["action"]:
+            old_values += 2
+            max_intensities[lights] = old_values
+        if frame_every and (i + 1) % frame_every == 0:
+            dump_light_planes(intensities, max_intensities, f"frames/{i + 1:04d}_")
+    dump_light_planes(intensities, max_intensities)
+    print(f"Max instantaneous: {max_intensities.max()}")
+    print(f"Max final: {intensities.max()}")
+    return int(intensities.sum())
+
+
+def user_logic_compressed(file: Path) -> int:
+    # lights sharing the same instruction edges are grouped into blocks, hence
+    # memory scales with the number of instructions instead of the grid area
+    instructions = list(decode_inputs(file))
+    row_edges = np.unique(
+        [e for i in instructions for e in (i["start_row"], i["end_row"] + 1)]
+    )
+    col_edges = np.unique(
+        [e for i in instructions for e in (i["start_col"], i["end_col"] + 1)]
+    )
+    blocks_shape = (len(row_edges) - 1, len(col_edges) - 1)
+    intensities = np.zeros(blocks_shape, dtype=np.int32)
+    max_intensities = np.zeros(blocks_shape, dtype=np.int32)
+    for instr in instructions:
+        row0, row1 = np.searchsorted(
+            row_edges, (instr["start_row"], instr["end_row"] + 1)
+        )
+        col0, col1 = np.searchsorted(
+            col_edges, (instr["start_col"], instr["end_col"] + 1)
+        )
+        old_values = intensities[row0:row1, col0:col1]
+        if "on" == instr["action"]:
+            old_values += 1
+            max_intensities[row0:row1, col0:col1] = old_values
+        elif "off" == instr["action"]:
+            max_intensities[row0:row1, col0:col1] = old_values
+            np.maximum(old_values - 1, 0, out=old_values)
+        elif "toggle" == instr["action"]:
+            old_values += 2
+            max_intensities[row0:row1, col0:col1] = old_values
+    print(f"Compressed grid: {blocks_shape[0]}x{blocks_shape[1]} blocks")
+    print(f"Max instantaneous: {max_intensities.max()}")
+    print(f"Max final: {intensities.max()}")
+    # per-row sums first, then Python integers as areas may overflow int64
+    row_sums = intensities.astype(np.int64) @ np.diff(col_edges)
+    return sum(int(h) * int(s) for h, s in zip(np.diff(row_edges), row_sums))
+
+
+def write_synthetic_instructions(
+    output: Path, count: int, grid_size: tuple[int, int], seed: int = 0
+) -> None:
+    rng = random.Random(seed)
+    with open(output, "w") as fh:
+        for _ in range(count):
+            action = rng.choice(("turn on", "turn off", "toggle"))
+            x0, x1 = sorted(rng.randrange(grid_size[0]) for _ in range(2))
+            y0, y1 = sorted(rng.randrange(grid_size[1]) for _ in range(2))
+            fh.write(f"{action} {x0},{y0} through {x1},{y1}\n")
+
+
 def explore(instructions: list) -> None:
     actions = Counter(i["action"] for i in instructions)
     print(f"Got {actions.total()} instructions")
@@ -108,23 +191,35 @@ def explore(instructions: list) -> None:
 
 
 def dump_lit_lights(lit_lights: dict, instruction_length: int) -> None:
-    pixels_img = Image.new("RGB", LIGHT_GRID_SIZE, 0)
-    max_pixels_img = Image.new("RGB", LIGHT_GRID_SIZE, 0)
-    pixels = pixels_img.load()
-    max_pixels = max_pixels_img.load()
-    for (x, y), (intensity, max_intensity) in lit_lights.items():
-        pixels[x, y] = (
-            ((intensity & 0x30) << 18)
-            + ((intensity & 0xC) << 12)
-            + ((intensity & 0x3) << 6)
-        )
-        max_pixels[x, y] = (
-            ((max_intensity & 0x30) << 18)
-            + ((max_intensity & 0xC) << 12)
-            + ((max_intensity & 0x3) << 6)
-        )
-    pixels_img.save("lights_intensity.png")
-    max_pixels_img.save("max_lights_intensity.png")
+    intensities = np.zeros(LIGHT_GRID_SIZE, dtype=np.int32)
+    max_intensities = np.zeros(LIGHT_GRID_SIZE, dtype=np.int32)
+    if lit_lights:
+        xs, ys = np.array(list(lit_lights.keys())).T
+        values = np.array(list(lit_lights.values())).T
+        intensities[xs, ys], max_intensities[xs, ys] = values
+    dump_light_planes(intensities, max_intensities)
+
+
+def intensity_pixels(intensities: np.ndarray) -> np.ndarray:
+    # two intensity bits per RGB channel, PIL images are indexed by (x, y)
+    intensities = intensities.T
+    return np.stack(
+        [
+            (intensities & 0x3) << 6,
+            (intensities & 0xC) << 4,
+            (intensities & 0x30) << 2,
+        ],
+        axis=-1,
+    ).astype(np.uint8)
+
+
+def dump_light_planes(
+    intensities: np.ndarray, max_intensities: np.ndarray, prefix: str = ""
+) -> None:
+    Image.fromarray(intensity_pixels(intensities)).save(f"{prefix}lights_intensity.png")
+    Image.fromarray(intensity_pixels(max_intensities)).save(
+        f"{prefix}max_lights_intensity.png"
+    )
 
 
 # FPGA Friendly Implementation -------------------------------------------------
@@ -134,48 +229,110 @@ MAX_LIGHT_INTENSITY: int = 49
 BITS_PER_LIGHT: int = math.ceil(math.log2(MAX_LIGHT_INTENSITY + 1))
 RAM_WIDTH: int = 36
 LIGHTS_PER_RAM_INSTANCE: int = RAM_WIDTH // BITS_PER_LIGHT
-RAM_INSTANCES: int = math.ceil(LIGHT_GRID_SIZE[0] / BITS_PER_LIGHT)
+RAM_INSTANCES: int = math.ceil(LIGHT_GRID_SIZE[0] / LIGHTS_PER_RAM_INSTANCE)
 
 
 def fpga_user_logic(file: Path) -> int:
-    light_intensities = defaultdict(lambda: [0, 0])
+    # one packed RAM_WIDTH-bit word per row and per RAM instance, light fields
+    # stored from the LSB upwards
+    ram_words = np.zeros((LIGHT_GRID_SIZE[1], RAM_INSTANCES), dtype=np.uint64)
+    field_shifts = np.arange(LIGHTS_PER_RAM_INSTANCE, dtype=np.uint64) * np.uint64(
+        BITS_PER_LIGHT
+    )
+    field_mask = np.uint64((1 << BITS_PER_LIGHT) - 1)
+    ram_accesses = []
+    instructions = list(decode_inputs(file))
+    for instr in instructions:
+        first_ram = instr["start_col"] // LIGHTS_PER_RAM_INSTANCE
+        last_ram = instr["end_col"] // LIGHTS_PER_RAM_INSTANCE
+        words = np.s_[
+            instr["start_row"] : 1 + instr["end_row"], first_ram : 1 + last_ram
+        ]
+        # read
+        ram_ligths = (ram_words[words][..., None] >> field_shifts) & field_mask
+        # modify selected fields only
+        light_index = np.arange(
+            first_ram * LIGHTS_PER_RAM_INSTANCE,
+            (last_ram + 1) * LIGHTS_PER_RAM_INSTANCE,
+        ).reshape(-1, LIGHTS_PER_RAM_INSTANCE)
+        light_select = (light_index >= instr["start_col"]) & (
+            light_index <= instr["end_col"]
+        )
+        ram_ligths = ram_ligths.astype(np.int64)
+        if "on" == instr["action"]:
+            ram_ligths[:, light_select] += 1
+        elif "off" == instr["action"]:
+            ram_ligths[:, light_select] -= ram_ligths[:, light_select] > 0
+        elif "toggle" == instr["action"]:
+            ram_ligths[:, light_select] += 2
+        assert ram_ligths.max() <= MAX_LIGHT_INTENSITY, "Light intensity overflow"
+        # write
+        ram_words[words] = np.bitwise_or.reduce(
+            ram_ligths.astype(np.uint64) << field_shifts, axis=-1
+        )
+        ram_accesses.append(ram_ligths.shape[0] * ram_ligths.shape[1])
+    # each word access is one read followed by one write
+    avg_accesses = sum(ram_accesses) / len(ram_accesses)
+    print(f"RAM instances: {RAM_INSTANCES} x {RAM_WIDTH}-bit words")
+    print(f"RAM word reads/writes: {sum(ram_accesses)} total")
+    print(f" - {max(ram_accesses)} max per instruction")
+    print(f" - {avg_accesses:.0f} average per instruction")
+    print(f" - {sum(ram_accesses) * RAM_WIDTH // 8} bytes each way")
+    ram_ligths = (ram_words[..., None] >> field_shifts) & field_mask
+    return int(ram_ligths.sum())
+
+
+INSTRUCTION_OVERHEAD = 4  # light_display: ready, capture and write latency
+ROW_BUFFER_LATENCY = 3  # light_display: LIGHT_UPDATE_LATENCY
+COLS_PER_PASS = 504  # light_display: all instructions replayed per column pass
+COLUMN_PASSES = math.ceil(LIGHT_GRID_SIZE[0] / COLS_PER_PASS)
+
+
+def fpga_row_sweep_user_logic(file: Path) -> tuple[int, list[int]]:
     instructions = list(decode_inputs(file))
+    starting_rows = defaultdict(list)
+    ending_rows = defaultdict(list)
     for i, instr in enumerate(instructions):
-        for row in range(instr["start_row"], 1 + instr["end_row"]):
-            for ram_i in range(RAM_INSTANCES):
-                ram_i_lsb_index = ram_i * LIGHTS_PER_RAM_INSTANCE
-                ram_i_msb_index = ram_i_lsb_index + LIGHTS_PER_RAM_INSTANCE - 1
-                ram_select = (
-                    min(1 + instr["end_col"], 1 + ram_i_msb_index)
-                    - max(instr["start_col"], ram_i_lsb_index)
-                ) > 0
-                if not ram_select:
-                    continue
-                ram_ligths = [
-                    light_intensities[row, i]
-                    for i in range(ram_i_lsb_index, ram_i_msb_index + 1)
-                ]
-                for ram_i_light in range(LIGHTS_PER_RAM_INSTANCE):
-                    ram_i_light_index = ram_i_lsb_index + ram_i_light
-                    ram_i_light_select = (
-                        ram_i_light_index >= instr["start_col"]
-                        and ram_i_light_index <= instr["end_col"]
-                    )
-                    if not ram_i_light_select:
-                        continue
-                    old_value = ram_ligths[ram_i_light][0]
-                    if "on" == instr["action"]:
-                        new_value = old_value + 1
-                        ram_ligths[ram_i_light] = [new_value, new_value]
-                    elif "off" == instr["action"]:
-                        new_value = max(old_value - 1, 0)
-                        ram_ligths[ram_i_light] = [new_value, old_value]
-                    elif "toggle" == instr["action"]:
-                        new_value = old_value + 2
-                        ram_ligths[ram_i_light] = [new_value, new_value]
-                for i in range(ram_i_lsb_index, ram_i_msb_index + 1):
-                    light_intensities[row, i] = ram_ligths[i - ram_i_lsb_index]
-    return sum(v[0] for v in light_intensities.values())
+        starting_rows[instr["start_row"]].append(i)
+        ending_rows[instr["end_row"]].append(i)
+
+    active_instructions: list[int] = []  # kept sorted, order matters
+    active_counts = []
+    intensity_sum = 0
+    row_buffer = np.zeros(LIGHT_GRID_SIZE[0], dtype=np.int32)
+    for row in range(LIGHT_GRID_SIZE[1]):
+        for i in starting_rows[row]:
+            bisect.insort(active_instructions, i)
+        row_buffer[:] = 0
+        for i in active_instructions:
+            instr = instructions[i]
+            lights = row_buffer[instr["start_col"] : 1 + instr["end_col"]]
+            if "on" == instr["action"]:
+                lights += 1
+            elif "off" == instr["action"]:
+                np.maximum(lights - 1, 0, out=lights)
+            elif "toggle" == instr["action"]:
+                lights += 2
+        intensity_sum += int(row_buffer.sum())
+        active_counts.append(len(active_instructions))
+        for i in ending_rows[row]:
+            active_instructions.remove(i)
+
+    row_major_cycles = sum(n + ROW_BUFFER_LATENCY for n in active_counts if n)
+    instr_major_cycles = COLUMN_PASSES * sum(
+        instr["end_row"] - instr["start_row"] + 1 + INSTRUCTION_OVERHEAD
+        for instr in instructions
+    )
+    busiest_row = max(range(len(active_counts)), key=active_counts.__getitem__)
+    print(f"Active instructions per row: {min(active_counts)} min")
+    print(f" - {sum(active_counts) / len(active_counts):.1f} average")
+    print(f" - {active_counts[busiest_row]} max (row {busiest_row})")
+    print(f"Estimated cycles, row-major sweep: {row_major_cycles}")
+    print(
+        f"Estimated cycles, instruction-major (light_display, {COLUMN_PASSES} passes):"
+        f" {instr_major_cycles}"
+    )
+    return (intensity_sum, active_counts)
 
 
 def main() -> int:
@@ -183,7 +340,12 @@ def main() -> int:
     file = "./test.txt" if len(sys.argv) < 2 else sys.argv[1]
     print(f"Contents {file=}")
     print(f"Result: {user_logic(file=Path(file))}")
+    print(f"Dense result: {user_logic_dense(file=Path(file))}")
+    print(f"Compressed result: {user_logic_compressed(file=Path(file))}")
     print(f"FPGA Result: {fpga_user_logic(file=Path(file))}")
+    result, active_counts = fpga_row_sweep_user_logic(file=Path(file))
+    print(f"Row sweep result: {result}")
+    print(f"Instruction buffer depth: {max(active_counts)}")
 
     return 0
 
@@ -3,13 +3,19 @@
 Design Space Exploration for Advent of Code 15: Day 7 - Part 1
 """
 
+import heapq
+import json
 import os
+import random
 import sys
-from collections import Counter
+import tempfile
+from collections import Counter, defaultdict, deque
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Iterator
 
 import graphviz
+import numpy as np
 
 OPERATORS = {
     "AND",
@@ -19,6 +25,23 @@ OPERATORS = {
     "RSHIFT",
 }
 START_WIRE = "a"
+WIRE_MASK = 0xFFFF
+OPERATIONS = {
+    "let": lambda x: x,
+    "invert": lambda x: ~x & WIRE_MASK,
+    "and": lambda x, y: x & y,
+    "or": lambda x, y: x | y,
+    "lshift": lambda x, y: (x << y) & WIRE_MASK,
+    "rshift": lambda x, y: x >> y,
+}
+RTL_OPERATORS = {
+    "LOAD": "let",
+    "NOT": "invert",
+    "AND": "and",
+    "OR": "or",
+    "LSHIFT": "lshift",
+    "RSHIFT": "rshift",
+}
 
 
 def decode_inputs(file: Path) -> Iterator[tuple[str, dict]]:
@@ -46,6 +69,41 @@ def decode_inputs(file: Path) -> Iterator[tuple[str, dict]]:
             yield (rhs, lhs)
 
 
+def wire_name(index: int) -> str:
+    # Bijective base 26: 1 -> "a", 26 -> "z", 27 -> "aa"
+    name = ""
+    while index:
+        index, letter = divmod(index - 1, 26)
+        name = chr(ord("a") + letter) + name
+    return name
+
+
+def write_synthetic_circuit(
+    output: Path, gates: int, window: int = 16, seed: int = 0
+) -> None:
+    # Operands are drawn from the last `window` wires, so a small window gives a
+    # deep circuit, the first wire is "b" and the last one drives START_WIRE
+    rng = random.Random(seed)
+    names = [wire_name(i) for i in range(2, gates + 2)]
+    lines = [f"{rng.randrange(1 << 16)} -> {names[0]}"]
+    for i in range(1, gates):
+        first = rng.choice(names[max(0, i - window) : i])
+        second = rng.choice(names[max(0, i - window) : i])
+        operator = rng.choice(("AND", "OR", "LSHIFT", "RSHIFT", "NOT", "1 AND"))
+        if operator == "NOT":
+            lines.append(f"NOT {first} -> {names[i]}")
+        elif operator == "1 AND":
+            lines.append(f"1 AND {first} -> {names[i]}")
+        elif operator in ("LSHIFT", "RSHIFT"):
+            lines.append(f"{first} {operator} {rng.randint(1, 15)} -> {names[i]}")
+        else:
+            lines.append(f"{first} {operator} {second} -> {names[i]}")
+    lines.append(f"{names[gates - 1]} -> {START_WIRE}")
+    rng.shuffle(lines)
+    with open(output, "w") as fh:
+        fh.writelines(f"{line}\n" for line in lines)
+
+
 def explore(file: Path) -> None:
     instructions = list(decode_inputs(file=file))
     print(f"Instruction count {len(instructions)}")
@@ -56,6 +114,64 @@ def explore(file: Path) -> None:
     print(f"Individual wires per length: {wire_lengths}")
 
 
+def analyze_circuit(file: Path, output: str = "circuit_levels") -> dict:
+    # Dependency depth of every wire, the critical path to START_WIRE, wires
+    # per level and fanout bound the cycle count of any hardware evaluator
+    instructions = dict(decode_inputs(file=file))
+    depth = {}
+    critical_operand = {}
+    fanout = Counter()
+    for wire in topological_order(instructions):
+        operands = [op for op in instructions[wire]["operands"] if not op.isdigit()]
+        fanout.update(set(operands))
+        if operands:
+            critical_operand[wire] = max(operands, key=depth.__getitem__)
+            depth[wire] = 1 + depth[critical_operand[wire]]
+        else:
+            depth[wire] = 0
+    critical_path = [START_WIRE]
+    while critical_path[-1] in critical_operand:
+        critical_path.append(critical_operand[critical_path[-1]])
+    critical_path.reverse()
+    level_widths = [0] * (1 + max(depth.values()))
+    for level in depth.values():
+        level_widths[level] += 1
+    max_fanout_wire, max_fanout = fanout.most_common(1)[0]
+
+    dot = graphviz.Digraph(name=output, graph_attr={"rankdir": "LR"})
+    for level in range(len(level_widths)):
+        with dot.subgraph(name=f"level_{level}") as rank:
+            rank.attr(rank="same")
+            for wire in (w for w, d in depth.items() if d == level):
+                operator = instructions[wire]["operator"]
+                rank.node(wire, label=f"{wire}\n{operator} @{level}")
+    critical_edges = set(zip(critical_path, critical_path[1:]))
+    for wire, instruction in instructions.items():
+        for op in set(instruction["operands"]):
+            if not op.isdigit():
+                color = "red" if (op, wire) in critical_edges else "black"
+                dot.edge(op, wire, color=color)
+    try:
+        dot.render(format="svg", cleanup=True)
+    except graphviz.ExecutableNotFound:
+        dot.save()
+        print(f"Graphviz not installed, saved {dot.filepath} only")
+
+    summary = {
+        "wires": len(instructions),
+        "depth": depth[START_WIRE],
+        "critical_path": critical_path,
+        "level_widths": level_widths,
+        "max_fanout": {"wire": max_fanout_wire, "fanout": max_fanout},
+    }
+    with open(f"{output}.json", "w") as fh:
+        json.dump(summary, fh, indent=2)
+    print(f"Depth of {START_WIRE}: {summary['depth']}, levels: {len(level_widths)}")
+    print(f"Widest level: {max(level_widths)} wires")
+    print(f"Max fanout: {max_fanout} ({max_fanout_wire})")
+    return summary
+
+
 def user_logic(file: Path) -> int:
     def get_signal(wire: str) -> int:
         if wire in lut:
@@ -102,6 +218,206 @@ def user_logic(file: Path) -> int:
     return retval
 
 
+def topological_order(instructions: dict[str, dict]) -> list[str]:
+    indegree = {}
+    fanout = defaultdict(list)
+    for wire, instruction in instructions.items():
+        dependencies = {op for op in instruction["operands"] if not op.isdigit()}
+        indegree[wire] = len(dependencies)
+        for dependency in dependencies:
+            fanout[dependency].append(wire)
+    queue = deque(wire for wire, count in indegree.items() if count == 0)
+    order = []
+    while queue:
+        wire = queue.popleft()
+        order.append(wire)
+        for next_wire in fanout[wire]:
+            indegree[next_wire] -= 1
+            if indegree[next_wire] == 0:
+                queue.append(next_wire)
+    if len(order) != len(instructions):
+        raise ValueError(f"{len(instructions) - len(order)} wires on loops or undriven")
+    return order
+
+
+def evaluate_circuit(
+    instructions: dict[str, dict], order: list[str], verbose: bool = False
+) -> dict[str, int]:
+    values = {}
+    for wire in order:
+        instruction = instructions[wire]
+        operands = (
+            int(op) if op.isdigit() else values[op] for op in instruction["operands"]
+        )
+        value = OPERATIONS[instruction["operator"]](*operands)
+        values[wire] = value
+        if verbose:
+            print(f"{wire=}, {instruction=} -> {value=}")
+    return values
+
+
+def topological_user_logic(file: Path, verbose: bool = False) -> int:
+    instructions = dict(decode_inputs(file=file))
+    values = evaluate_circuit(instructions, topological_order(instructions), verbose)
+    return values[START_WIRE]
+
+
+def compile_circuit(
+    instructions: dict[str, dict],
+    input_wires: Iterable[str],
+    output_wires: Iterable[str] = (START_WIRE,),
+) -> tuple[dict[str, int], list[tuple]]:
+    # Straight-line program over value slots, operands are (1, slot) or
+    # (0, constant) like the RTL operands, input wires are driven externally
+    # and each step lists the slots released after their last consumer
+    input_wires = set(input_wires)
+    instructions = {
+        wire: {"operator": "input", "operands": []} if wire in input_wires else instr
+        for wire, instr in instructions.items()
+    }
+    order = topological_order(instructions)
+    slots = {wire: slot for slot, wire in enumerate(order)}
+    outputs = {wire: slots[wire] for wire in output_wires}
+    last_use = list(range(len(order)))
+    for wire in order:
+        for op in instructions[wire]["operands"]:
+            if not op.isdigit():
+                last_use[slots[op]] = slots[wire]
+    kept = set(outputs.values())
+    released = defaultdict(list)
+    for slot, step in enumerate(last_use):
+        if slot not in kept:
+            released[step].append(slot)
+    program = []
+    for wire in order:
+        instruction = instructions[wire]
+        if instruction["operator"] == "input":
+            operands = ((0, wire),)
+        else:
+            operands = tuple(
+                (0, np.uint16(op)) if op.isdigit() else (1, slots[op])
+                for op in instruction["operands"]
+            )
+        slot = slots[wire]
+        program.append((slot, instruction["operator"], operands, released[slot]))
+    return (outputs, program)
+
+
+def evaluate_batch(
+    outputs: dict[str, int],
+    program: list[tuple],
+    inputs: dict[str, np.ndarray],
+    chunk_size: int = 1 << 12,
+) -> dict[str, np.ndarray]:
+    # Live slots hold at most one chunk each, so memory is bounded by the
+    # circuit width rather than by the gate count times the batch size
+    batch_size = max(len(values) for values in inputs.values())
+    inputs = {
+        wire: np.broadcast_to(np.asarray(values, dtype=np.uint16), batch_size)
+        for wire, values in inputs.items()
+    }
+    results = {wire: np.empty(batch_size, dtype=np.uint16) for wire in outputs}
+    for start in range(0, batch_size, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        values = [None] * len(program)
+        for slot, operator, operands, released in program:
+            if operator == "input":
+                values[slot] = inputs[operands[0][1]][chunk]
+            else:
+                args = (values[op] if is_wire else op for is_wire, op in operands)
+                values[slot] = OPERATIONS[operator](*args)
+            for free_slot in released:
+                values[free_slot] = None
+        for wire, slot in outputs.items():
+            results[wire][chunk] = values[slot]
+    return results
+
+
+def batch_user_logic(file: Path, input_wire: str = "b") -> np.ndarray:
+    """
+    Evaluate the circuit for every value driven onto the input wire
+
+    :param file: file containing the input values
+    :param input_wire: wire overridden with all 16-bit values
+    :return: value of START_WIRE per input wire value
+    """
+
+    instructions = dict(decode_inputs(file=file))
+    outputs, program = compile_circuit(instructions, [input_wire])
+    sweep = np.arange(WIRE_MASK + 1, dtype=np.uint16)
+    return evaluate_batch(outputs, program, {input_wire: sweep})[START_WIRE]
+
+
+def write_test_vectors(file: Path, output: Path, input_wire: str = "b") -> None:
+    # One "<input_wire> <START_WIRE>" hex pair per line, for all input values
+    start_wire_values = batch_user_logic(file=file, input_wire=input_wire)
+    with open(output, "w") as fh:
+        for value, result in enumerate(start_wire_values.tolist()):
+            fh.write(f"{value:04x} {result:04x}\n")
+
+
+class IncrementalCircuit:
+    """
+    Resolved wire values kept up to date when wires are overridden, only the
+    downstream cone of the overridden wire is re-evaluated.
+    """
+
+    def __init__(self, instructions: dict[str, dict]):
+        self.instructions = dict(instructions)
+        order = topological_order(self.instructions)
+        self.rank = {wire: rank for rank, wire in enumerate(order)}
+        self.fanout = defaultdict(set)
+        for wire, instruction in self.instructions.items():
+            for op in instruction["operands"]:
+                if not op.isdigit():
+                    self.fanout[op].add(wire)
+        self.values = evaluate_circuit(self.instructions, order)
+
+    def override(self, wire: str, value: int) -> int:
+        """
+        Drive a constant onto a wire and re-evaluate its cone
+
+        :param wire: wire to override
+        :param value: value driven onto the wire
+        :return: number of re-evaluated wires
+        """
+        for op in self.instructions[wire]["operands"]:
+            self.fanout[op].discard(wire)
+        self.instructions[wire] = {
+            "operator": "let",
+            "operands": [str(value & WIRE_MASK)],
+        }
+        # A constant only removes edges, the topological ranks stay valid
+        dirty = [(self.rank[wire], wire)]
+        queued = {wire}
+        cone_size = 0
+        while dirty:
+            _, wire = heapq.heappop(dirty)
+            cone_size += 1
+            instruction = self.instructions[wire]
+            operands = (
+                int(op) if op.isdigit() else self.values[op]
+                for op in instruction["operands"]
+            )
+            value = OPERATIONS[instruction["operator"]](*operands)
+            if value == self.values[wire]:
+                continue
+            self.values[wire] = value
+            for next_wire in self.fanout[wire] - queued:
+                queued.add(next_wire)
+                heapq.heappush(dirty, (self.rank[next_wire], next_wire))
+        return cone_size
+
+
+def incremental_user_logic(file: Path, override_wire: str = "b") -> int:
+    circuit = IncrementalCircuit(dict(decode_inputs(file=file)))
+    cone_size = circuit.override(override_wire, circuit.values[START_WIRE])
+    print(
+        f"Override {override_wire}: {cone_size}/{len(circuit.values)} wires re-evaluated"
+    )
+    return circuit.values[START_WIRE]
+
+
 def rtl_decode_inputs(file: Path):
     scratch_str = ""
     scratch_int = 0
@@ -168,18 +484,22 @@ def rtl_decode_inputs(file: Path):
                             if opcode == "NOT":
                                 yield (wire, (0, 0), (1, first_operand_str), opcode)
                             elif opcode in ("AND", "OR"):
+                                if first_operand_str:
+                                    first_operand = (1, first_operand_str)
+                                else:
+                                    first_operand = (0, first_operand_int)
                                 if second_operand_str:
                                     yield (
                                         wire,
                                         (1, second_operand_str),
-                                        (1, first_operand_str),
+                                        first_operand,
                                         opcode,
                                     )
                                 else:
                                     yield (
                                         wire,
                                         (0, second_operand_int),
-                                        (1, first_operand_str),
+                                        first_operand,
                                         opcode,
                                     )
                             else:
@@ -201,47 +521,201 @@ def rtl_decode_inputs(file: Path):
                         opcode = ""
 
 
+def bulk_decode_inputs(file: Path) -> Iterator[tuple]:
+    # Same records as rtl_decode_inputs, split per line and token instead of
+    # walking every char, only LF terminated lines produce a record
+    def operand(token: str) -> tuple:
+        return (0, int(token)) if token.isdigit() else (1, token)
+
+    with open(file, "rb") as fh:
+        lines = fh.read().decode("ascii").split("\n")[:-1]
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        wire = tokens[-1]
+        if len(tokens) == 3:
+            yield (wire, (0, 0), operand(tokens[0]), "LOAD")
+        elif len(tokens) == 4:
+            yield (wire, (0, 0), operand(tokens[1]), tokens[0])
+        else:
+            yield (wire, operand(tokens[2]), operand(tokens[0]), tokens[1])
+
+
+def check_bulk_decode_inputs(file: Path) -> int:
+    """
+    Cross-check the bulk tokenizer against `rtl_decode_inputs`
+
+    :param file: file containing the input values
+    :return: number of checked records
+    """
+
+    records = list(bulk_decode_inputs(file=file))
+    assert records == list(rtl_decode_inputs(file=file))
+    # Blank lines are skipped by the char state machine, so must be here too
+    lines = file.read_text().splitlines(keepends=True)
+    lines[len(lines) // 2 : len(lines) // 2] = ["\n", "  \n"]
+    with tempfile.TemporaryDirectory() as tmp:
+        blank_lines_file = Path(tmp) / "blank_lines.txt"
+        blank_lines_file.write_text("".join(["\n", *lines, "\n"]))
+        assert list(bulk_decode_inputs(file=blank_lines_file)) == records
+        assert list(rtl_decode_inputs(file=blank_lines_file)) == records
+    return len(records)
+
+
+def schedule_instructions(instructions: list[tuple]) -> tuple[dict[str, int], int, int]:
+    # Each resolved wire only wakes the instructions consuming it, the ready
+    # queue is drained one round at a time like a hardware dependency scheduler
+    instruction_map = {
+        wire: (sec_op, first_op, opcode)
+        for wire, sec_op, first_op, opcode in instructions
+    }
+    pending = {}
+    consumers = defaultdict(list)
+    for wire, (sec_op, first_op, _) in instruction_map.items():
+        operands = {op[1] for op in (sec_op, first_op) if op[0]}
+        pending[wire] = len(operands)
+        for operand in operands:
+            consumers[operand].append(wire)
+    ready = deque(wire for wire, count in pending.items() if count == 0)
+    solved_map = {}
+    rounds = 0
+    peak_depth = len(ready)
+    while ready:
+        rounds += 1
+        for _ in range(len(ready)):
+            wire = ready.popleft()
+            sec_op, first_op, opcode = instruction_map[wire]
+            operands = [
+                solved_map[op[1]] if op[0] else op[1] for op in (first_op, sec_op)
+            ]
+            if opcode in ("LOAD", "NOT"):
+                operands = operands[:1]
+            solved_map[wire] = OPERATIONS[RTL_OPERATORS[opcode]](*operands)
+            for next_wire in consumers[wire]:
+                pending[next_wire] -= 1
+                if pending[next_wire] == 0:
+                    ready.append(next_wire)
+            peak_depth = max(peak_depth, len(ready))
+    return (solved_map, rounds, peak_depth)
+
+
+WIRE_LETTER_BITS = 5
+WIRE_OPERAND_FLAG = 1 << 16
+OPERAND_MASK = WIRE_OPERAND_FLAG | WIRE_MASK
+OPCODE_MASK = 0b111
+
+
+def get_wire_value(wire: str) -> int:
+    retval: int = 0
+    for c in wire:
+        retval = (retval << WIRE_LETTER_BITS) + ord(c) - ord("a") + 1
+    return retval
+
+
+def get_opcode_value(opcode: str) -> int:
+    retval: int = 0
+    if opcode == "LOAD":
+        retval = 0b010
+    elif opcode == "NOT":
+        retval = 0b011
+    elif opcode == "AND":
+        retval = 0b100
+    elif opcode == "OR":
+        retval = 0b101
+    elif opcode == "LSHIFT":
+        retval = 0b110
+    elif opcode == "RSHIFT":
+        retval = 0b111
+    return retval
+
+
+def get_operand_value(operand: tuple) -> int:
+    retval: int = 0
+    str_type = operand[0]
+    if not str_type:
+        retval = operand[1]
+    else:
+        retval = WIRE_OPERAND_FLAG + get_wire_value(operand[1])
+    return retval
+
+
+def get_instruction_value(instruction: tuple) -> int:
+    sec_op, first_op, opcode = instruction
+    return (
+        (get_operand_value(sec_op) << 20)
+        | (get_operand_value(first_op) << 3)
+        | get_opcode_value(opcode)
+    )
+
+
+def instruction_image(instructions: list[tuple]) -> list[int]:
+    # Instruction RAM addressed by the packed wire ID, 0 marks empty entries
+    address_width = WIRE_LETTER_BITS * max(len(wire) for wire, *_ in instructions)
+    if address_width > WIRE_MASK.bit_length():
+        raise ValueError(f"{address_width}-bit wire IDs do not fit an operand")
+    memory = [0] * (1 << address_width)
+    for wire, sec_op, first_op, opcode in instructions:
+        memory[get_wire_value(wire)] = get_instruction_value((sec_op, first_op, opcode))
+    return memory
+
+
+def write_instruction_image(file: Path, output: Path) -> None:
+    # $readmemh image, one 40-bit instruction word per address
+    memory = instruction_image(list(bulk_decode_inputs(file=file)))
+    with open(output, "w") as fh:
+        fh.writelines(f"{word:010x}\n" for word in memory)
+
+
+def packed_user_logic(file: Path) -> int:
+    memory = instruction_image(list(bulk_decode_inputs(file=file)))
+    opcode_operations = {
+        get_opcode_value(opcode): OPERATIONS[operator]
+        for opcode, operator in RTL_OPERATORS.items()
+    }
+    unary_opcodes = {get_opcode_value("LOAD"), get_opcode_value("NOT")}
+    values = [0] * len(memory)
+    resolved = [False] * len(memory)
+    pending = [0] * len(memory)
+    consumers = [[] for _ in memory]
+    ready = deque()
+    for address, word in enumerate(memory):
+        if not word:
+            continue
+        operands = {
+            op & WIRE_MASK
+            for op in ((word >> 3) & OPERAND_MASK, word >> 20)
+            if op & WIRE_OPERAND_FLAG
+        }
+        pending[address] = len(operands)
+        for operand in operands:
+            consumers[operand].append(address)
+        if not operands:
+            ready.append(address)
+    while ready:
+        address = ready.popleft()
+        word = memory[address]
+        opcode = word & OPCODE_MASK
+        operands = [
+            values[op & WIRE_MASK] if op & WIRE_OPERAND_FLAG else op
+            for op in ((word >> 3) & OPERAND_MASK, word >> 20)
+        ]
+        if opcode in unary_opcodes:
+            operands = operands[:1]
+        values[address] = opcode_operations[opcode](*operands)
+        resolved[address] = True
+        for consumer in consumers[address]:
+            pending[consumer] -= 1
+            if pending[consumer] == 0:
+                ready.append(consumer)
+    # Missing or depending on an undriven wire, never reached the ready queue
+    if not resolved[get_wire_value(START_WIRE)]:
+        raise KeyError(START_WIRE)
+    return values[get_wire_value(START_WIRE)]
+
+
 def rtl_user_logic(file: Path) -> int:
     def dump_instructions(instructions: list) -> None:
-        def get_wire_value(wire: str) -> int:
-            retval: int = 0
-            for c in wire:
-                retval = (retval << 5) + ord(c) - ord("a") + 1
-            return retval
-
-        def get_opcode_value(opcode: str) -> int:
-            retval: int = 0
-            if opcode == "LOAD":
-                retval = 0b010
-            elif opcode == "NOT":
-                retval = 0b011
-            elif opcode == "AND":
-                retval = 0b100
-            elif opcode == "OR":
-                retval = 0b101
-            elif opcode == "LSHIFT":
-                retval = 0b110
-            elif opcode == "RSHIFT":
-                retval = 0b111
-            return retval
-
-        def get_operand_value(operand: tuple) -> int:
-            retval: int = 0
-            str_type = operand[0]
-            if not str_type:
-                retval = operand[1]
-            else:
-                retval = (1 << 16) + get_wire_value(operand[1])
-            return retval
-
-        def get_instruction_value(instruction: tuple) -> int:
-            sec_op, first_op, opcode = instruction
-            return (
-                (get_operand_value(sec_op) << 20)
-                | (get_operand_value(first_op) << 3)
-                | get_opcode_value(opcode)
-            )
-
         for wire, sec_op, first_op, opcode in instructions:
             instruction = (sec_op, first_op, opcode)
             print(
@@ -250,61 +724,9 @@ def rtl_user_logic(file: Path) -> int:
 
     instructions = list(rtl_decode_inputs(file=file))
     dump_instructions(instructions)
-    map = {
-        wire: (sec_op, first_op, opcode)
-        for wire, sec_op, first_op, opcode in instructions
-    }
-    solved_map = {}
-    TARGET_WIRE = "a"
-    while TARGET_WIRE not in solved_map:
-        print(f"{len(solved_map)}")
-        for wire, instruction in map.items():
-            if wire in solved_map.keys():
-                continue
-            if instruction[2] == "LOAD":
-                operand_is_str = instruction[1][0]
-                if operand_is_str:
-                    continue
-                solved_map[wire] = instruction[1][1]
-            elif instruction[2] == "NOT":
-                if instruction[1][1] not in solved_map:
-                    continue
-                solved_map[wire] = ~solved_map[instruction[1][1]]
-            elif instruction[2] == "AND":
-                if instruction[1][1] not in solved_map:
-                    continue
-                operand_is_str = instruction[0][0]
-                if not operand_is_str:
-                    solved_map[wire] = instruction[0][1] & solved_map[instruction[1][1]]
-                else:
-                    if instruction[0][1] not in solved_map:
-                        continue
-                    solved_map[wire] = (
-                        solved_map[instruction[0][1]] & solved_map[instruction[1][1]]
-                    )
-            elif instruction[2] == "OR":
-                if instruction[1][1] not in solved_map:
-                    continue
-                operand_is_str = instruction[0][0]
-                if not operand_is_str:
-                    solved_map[wire] = instruction[0][1] | solved_map[instruction[1][1]]
-                else:
-                    if instruction[0][1] not in solved_map:
-                        continue
-                    solved_map[wire] = (
-                        solved_map[instruction[0][1]] | solved_map[instruction[1][1]]
-                    )
-            elif instruction[2] == "LSHIFT":
-                if instruction[1][1] not in solved_map:
-                    continue
-                solved_map[wire] = solved_map[instruction[1][1]] << instruction[0][1]
-            elif instruction[2] == "RSHIFT":
-                if instruction[1][1] not in solved_map:
-                    continue
-                solved_map[wire] = solved_map[instruction[1][1]] >> instruction[0][1]
-            else:
-                assert False
-    return 0
+    solved_map, rounds, peak_depth = schedule_instructions(instructions)
+    print(f"Scheduling rounds: {rounds}, peak ready queue depth: {peak_depth}")
+    return solved_map[START_WIRE]
 
 
 def main() -> int:
@@ -314,9 +736,17 @@ def main() -> int:
     explore_design_space = True
     if explore_design_space:
         explore(file=Path(file))
+        # analyze_circuit(file=Path(file))
     print(f"Result: {user_logic(file=Path(file))}")
+    result = topological_user_logic(file=Path(file))
+    print(f"Topological result: {result}")
+    start_wire_values = batch_user_logic(file=Path(file))
+    print(f"Part 2 result (b <- a): {start_wire_values[result]}")
+    print(f"Incremental part 2 result: {incremental_user_logic(file=Path(file))}")
     # instructions = list(rtl_decode_inputs(file=Path(file)))
-    rtl_user_logic(file=Path(file))
+    print(f"RTL result: {rtl_user_logic(file=Path(file))}")
+    print(f"Bulk decoded records: {check_bulk_decode_inputs(file=Path(file))}")
+    print(f"Packed wire ID result: {packed_user_logic(file=Path(file))}")
     return 0
 
 
@@ -10,6 +10,8 @@ from collections import defaultdict, deque
 from collections.abc import Iterable
 from pathlib import Path
 
+import numpy as np
+
 DEBUG = False
 
 
@@ -38,6 +40,81 @@ def append_base(node_string: str) -> tuple[str, str]:
     return (node_string, node_base)
 
 
+# Byte to 5-bit letter value lookup table, separators map to NOT_LETTER
+NODE_CHARS = 3
+NODE_BIN_BITS = 5
+NOT_LETTER = 0xFF
+LETTER_TABLE = np.full(256, NOT_LETTER, dtype=np.uint8)
+LETTER_TABLE[Char.A_CHAR : Char.Z_CHAR + 1] = np.arange(Char.Z_CHAR - Char.A_CHAR + 1)
+
+
+def decode_edges(
+    file: Path, chunk_size: int = 1 << 20
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode contents of the given file through a byte lookup table, packing
+        node names as input_decoder.sv does (first char in the LSBs)
+
+    :param file: file containing the input values
+    :param chunk_size: number of bytes read at once, cut back to the last line
+    :return: source nodes, edge source index and edge destination node arrays
+    """
+
+    chunks = []
+    remainder = b""
+    with open(file, "rb") as f:
+        while chunk := f.read(chunk_size):
+            chunk = remainder + chunk
+            end = chunk.rfind(Char.LF_CHAR) + 1
+            chunk, remainder = (chunk[:end], chunk[end:])
+            chunks.append(decode_edge_lines(chunk))
+    chunks.append(decode_edge_lines(remainder))
+    src_nodes, edge_src, edge_dst = ([], [], [])
+    src_count = 0
+    for sources, src_index, destinations in chunks:
+        src_nodes.append(sources)
+        edge_src.append(src_index + src_count)
+        edge_dst.append(destinations)
+        src_count += len(sources)
+    return (
+        np.concatenate(src_nodes),
+        np.concatenate(edge_src),
+        np.concatenate(edge_dst),
+    )
+
+
+def decode_edge_lines(chunk: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode complete lines through the byte lookup table
+
+    :param chunk: bytes holding whole lines, only the last one may lack its LF
+    :return: source nodes, edge source index and edge destination node arrays
+    """
+
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    letters = LETTER_TABLE[data]
+    is_letter = np.concatenate(([False], letters != NOT_LETTER, [False]))
+    bounds = np.diff(is_letter.view(np.int8))
+    starts = np.flatnonzero(bounds == 1)
+    ends = np.flatnonzero(bounds == -1)
+    nodes = np.zeros(len(starts), dtype=np.uint16)
+    for k in range(NODE_CHARS):
+        mask = k < ends - starts
+        letter = letters[starts[mask] + k].astype(np.uint16)
+        nodes[mask] |= letter << (k * NODE_BIN_BITS)
+    is_src = np.zeros(len(starts), dtype=bool)
+    is_src[ends < len(data)] = data[ends[ends < len(data)]] == Char.COLON_CHAR
+    src_index = np.cumsum(is_src) - 1
+    return (nodes[is_src], src_index[~is_src], nodes[~is_src])
+
+
+def node_name(node: int) -> str:
+    return "".join(
+        chr(Char.A_CHAR + ((node >> (k * NODE_BIN_BITS)) & ((1 << NODE_BIN_BITS) - 1)))
+        for k in range(NODE_CHARS)
+    )
+
+
 def decode_inputs(file: Path) -> Iterable[tuple[tuple[str, str], tuple]]:
     """
     Decode contents of the given file
@@ -46,14 +123,13 @@ def decode_inputs(file: Path) -> Iterable[tuple[tuple[str, str], tuple]]:
     :return: list
     """
 
-    for line in open(file):
-        (lhs, rhs) = line.split(chr(Char.COLON_CHAR.value))
+    src_nodes, edge_src, edge_dst = decode_edges(file=file)
+    edge_counts = np.bincount(edge_src, minlength=len(src_nodes))
+    dst_nodes = np.split(edge_dst, np.cumsum(edge_counts)[:-1])
+    for src_node, dst in zip(src_nodes.tolist(), dst_nodes):
         yield (
-            append_base(lhs),
-            tuple(
-                append_base(node)
-                for node in rhs.strip().split(chr(Char.SPACE_CHAR.value))
-            ),
+            append_base(node_name(src_node)),
+            tuple(append_base(node_name(node)) for node in dst.tolist()),
         )
 
 
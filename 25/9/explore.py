@@ -10,9 +10,60 @@ import sys
 from collections.abc import Iterable
 from pathlib import Path
 
+import numpy as np
+
 
 class Char(enum.IntEnum):
     COMA_CHAR = 0x2C  # ','
+    LF_CHAR = 0x0A  # Line Feed (NL)
+    ZERO_CHAR = 0x30  # '0'
+
+
+# Byte to digit value lookup table, separators map to NOT_DIGIT
+NOT_DIGIT = 0xFF
+DIGIT_TABLE = np.full(256, NOT_DIGIT, dtype=np.uint8)
+DIGIT_TABLE[Char.ZERO_CHAR : Char.ZERO_CHAR + 10] = np.arange(10)
+
+
+def decode_tiles(file: Path, chunk_size: int = 1 << 20) -> np.ndarray:
+    """
+    Decode contents of the given file through a byte lookup table
+
+    :param file: file containing the input values
+    :param chunk_size: number of bytes read at once, cut back to the last line
+    :return: (N, 2) int64 array of tile coordinates
+    """
+
+    values = [np.zeros(0, dtype=np.int64)]
+    remainder = b""
+    with open(file, "rb") as f:
+        while chunk := f.read(chunk_size):
+            chunk = remainder + chunk
+            end = chunk.rfind(Char.LF_CHAR) + 1
+            chunk, remainder = (chunk[:end], chunk[end:])
+            values.append(decode_integers(chunk))
+    values.append(decode_integers(remainder))
+    return np.concatenate(values).reshape(-1, 2)
+
+
+def decode_integers(chunk: bytes) -> np.ndarray:
+    """
+    Decode the decimal integers of a chunk through the byte lookup table
+
+    :param chunk: bytes holding whole lines, only the last one may lack its LF
+    :return: int64 array of the integers in order of appearance
+    """
+
+    digits = DIGIT_TABLE[np.frombuffer(chunk, dtype=np.uint8)]
+    is_digit = np.concatenate(([False], digits != NOT_DIGIT, [False]))
+    edges = np.diff(is_digit.view(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    values = np.zeros(len(starts), dtype=np.int64)
+    for k in range(lengths.max(initial=0)):
+        mask = k < lengths
+        values[mask] = values[mask] * 10 + digits[starts[mask] + k]
+    return values
 
 
 def decode_inputs(file: Path) -> Iterable[tuple[int, int]]:
@@ -23,9 +74,7 @@ def decode_inputs(file: Path) -> Iterable[tuple[int, int]]:
     :return: list
     """
 
-    for line in open(file):
-        (lhs, rhs) = line.split(chr(Char.COMA_CHAR.value))
-        yield (int(lhs), int(rhs))
+    yield from map(tuple, decode_tiles(file=file).tolist())
 
 
 def user_logic(file: Path) -> int: